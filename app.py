@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import os
+import shutil
 import tempfile
 from pathlib import Path
 from urllib.parse import urlparse
@@ -10,10 +10,12 @@ from urllib.parse import urlparse
 import streamlit as st
 
 from convert import convert_to_wav
-from core import transcribe_file
+from core import get_model_sample_rate
+from dedup import transcribe_deduplicated
 from download import download_from_url
 from model_setup import ensure_model_available
 from punctuation import punctuate_text
+from results_store import JsonlResultStore, paginate_file, read_page, write_json_export, write_txt_export
 
 
 st.set_page_config(page_title="Simple Text2Speech - Speech to Text", page_icon="🎙️")
@@ -26,6 +28,25 @@ def prepare_model() -> Path:
     return ensure_model_available()
 
 
+TRANSCRIPT_PAGE_CHARS = 20000
+
+
+def upload_digest(upload) -> str:
+    """SHA-256 of an upload, computed once per uploaded file rather than per rerun."""
+    upload_id = getattr(upload, "file_id", None) or f"{upload.name}:{upload.size}"
+    cached = st.session_state.get("upload_digest")
+    if cached is None or cached[0] != upload_id:
+        cached = (upload_id, hashlib.sha256(upload.getvalue()).hexdigest())
+        st.session_state["upload_digest"] = cached
+    return cached[1]
+
+
+def discard_dir(key: str) -> None:
+    previous = st.session_state.pop(key, None)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
 try:
     with st.spinner("Preparing speech model..."):
         model_path = prepare_model()
@@ -68,66 +89,124 @@ else:
 
 save_words = st.checkbox("Include word timestamps in JSON output", value=False)
 
+with st.expander("Transcribe only part of the file"):
+    range_start = st.number_input("Start (seconds)", min_value=0.0, value=0.0, step=1.0)
+    range_end = st.number_input("End (seconds, 0 = end of file)", min_value=0.0, value=0.0, step=1.0)
+
+start_time = range_start or None
+end_time = range_end or None
+if end_time is not None and end_time <= (start_time or 0.0):
+    st.error("End must be later than start.")
+    st.stop()
+
 # Process the file (either uploaded or from URL)
 if uploaded_file is not None or url_input:
-    # Determine file suffix and create cache key
+    # Determine file suffix and create cache keys: audio_key identifies the
+    # converted audio, cache_key the transcription result built from it.
     if uploaded_file is not None:
         suffix = Path(uploaded_file.name).suffix.lower()
-        file_bytes = uploaded_file.getvalue()
-        file_hash = hashlib.sha256(file_bytes).hexdigest()
-        cache_key = f"upload:{uploaded_file.name}:{len(file_bytes)}:{file_hash}:{save_words}"
+        audio_key = f"upload:{uploaded_file.name}:{uploaded_file.size}:{upload_digest(uploaded_file)}:{start_time}:{end_time}"
     else:
         # For URL, use URL itself as part of cache key
         suffix = Path(urlparse(url_input).path).suffix.lower() or ".tmp"
-        cache_key = f"url:{url_input}:{save_words}"
+        audio_key = f"url:{url_input}:{start_time}:{end_time}"
+    cache_key = f"{audio_key}:{save_words}"
     
     if suffix not in {".m4a", ".mov", ".mp3", ".mp4", ".wav", ".tmp"}:
         st.error("Unsupported file type. Please use m4a, mov, mp3, mp4, or wav files.")
         st.stop()
 
     if st.session_state.get("last_cache_key") != cache_key:
-        with tempfile.TemporaryDirectory(prefix="stt_process_") as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Get the source file (either from upload or URL)
-            if uploaded_file is not None:
-                source_path = temp_path / uploaded_file.name
-                source_path.write_bytes(file_bytes)
-            else:
+        wav_path = None
+        if st.session_state.get("last_audio_key") == audio_key:
+            # Same audio with different options (e.g. word timestamps toggled): skip download and conversion.
+            wav_path = Path(st.session_state["last_wav_path"])
+            if not wav_path.exists():
+                wav_path = None
+
+        if wav_path is None:
+            with tempfile.TemporaryDirectory(prefix="stt_process_") as temp_dir:
+                temp_path = Path(temp_dir)
+                
+                # Get the source file (either from upload or URL)
+                if uploaded_file is not None:
+                    source_path = temp_path / uploaded_file.name
+                    source_path.write_bytes(uploaded_file.getvalue())
+                else:
+                    try:
+                        with st.spinner("Downloading file from URL..."):
+                            source_path = download_from_url(url_input)
+                    except Exception as exc:
+                        st.error(f"Download failed: {exc}")
+                        st.stop()
+
                 try:
-                    with st.spinner("Downloading file from URL..."):
-                        source_path = download_from_url(url_input)
+                    with st.spinner("Preparing audio..."):
+                        wav_path = convert_to_wav(
+                            source_path,
+                            start=start_time,
+                            end=end_time,
+                            sample_rate=get_model_sample_rate(model_path),
+                        )
                 except Exception as exc:
-                    st.error(f"Download failed: {exc}")
+                    st.error(f"Processing failed: {exc}")
                     st.stop()
 
-            try:
-                with st.spinner("Preparing audio..."):
-                    wav_path = convert_to_wav(source_path)
-
-                with st.spinner("Transcribing..."):
-                    transcription = transcribe_file(wav_path, save_words=save_words)
-            except Exception as exc:
-                st.error(f"Processing failed: {exc}")
-                st.stop()
+            # The converted WAV outlives this run so option changes can reuse it.
+            discard_dir("last_wav_dir")
+            st.session_state["last_audio_key"] = audio_key
+            st.session_state["last_wav_path"] = str(wav_path)
+            st.session_state["last_wav_dir"] = str(wav_path.parent)
+
+        # Word timings and export files live on disk for as long as this result is shown.
+        result_dir = Path(tempfile.mkdtemp(prefix="stt_result_"))
+        result_store = JsonlResultStore(result_dir / "chunks.jsonl")
+
+        try:
+            with st.spinner("Transcribing..."):
+                # Identical audio in another container reuses the stored transcript.
+                transcription, _ = transcribe_deduplicated(
+                    wav_path,
+                    save_words=save_words,
+                    time_offset=start_time or 0.0,
+                    result_store=result_store,
+                )
+        except Exception as exc:
+            result_store.close()
+            shutil.rmtree(result_dir, ignore_errors=True)
+            st.error(f"Processing failed: {exc}")
+            st.stop()
+
+        result_store.close()
 
         with st.spinner("Adding punctuation..."):
             punctuated_text, punctuation_applied, punctuation_error = punctuate_text(
                 transcription.get("text", ""),
-                transcription.get("result"),
+                result_store.iter_words() if save_words else None,
+            )
+
+        with st.spinner("Preparing downloads..."):
+            txt_path = write_txt_export(punctuated_text, result_dir / "transcript.txt")
+            json_path = write_json_export(
+                punctuated_text,
+                result_store.iter_words() if save_words else None,
+                result_dir / "transcript.json",
             )
 
-        transcription["text"] = punctuated_text
+        discard_dir("last_result_dir")
 
         st.session_state["last_cache_key"] = cache_key
-        st.session_state["last_transcription"] = transcription
-        st.session_state["last_punctuated"] = punctuated_text
+        st.session_state["last_result_dir"] = str(result_dir)
+        # Session state holds only paths and page offsets; the text stays on disk.
+        st.session_state["last_txt_path"] = str(txt_path)
+        st.session_state["last_json_path"] = str(json_path)
+        st.session_state["last_pages"] = paginate_file(txt_path, TRANSCRIPT_PAGE_CHARS)
         st.session_state["punctuation_applied"] = punctuation_applied
         st.session_state["punctuation_error"] = punctuation_error
         st.session_state["last_file_stem"] = Path(source_name).stem
 
-    transcription = st.session_state.get("last_transcription", {})
-    transcript_text = transcription.get("text", "")
+    txt_path = Path(st.session_state["last_txt_path"])
+    pages = st.session_state.get("last_pages", [(0, 0)])
     punctuation_applied = st.session_state.get("punctuation_applied", True)
     punctuation_error = st.session_state.get("punctuation_error")
 
@@ -139,23 +218,28 @@ if uploaded_file is not None or url_input:
             st.caption(f"Punctuation detail: {punctuation_error}")
 
     st.subheader("Transcript")
-    st.text_area("Full transcript", value=transcript_text, height=300)
-
-    txt_bytes = transcript_text.encode("utf-8")
-    json_bytes = json.dumps(transcription, indent=2, ensure_ascii=False).encode("utf-8")
+    if len(pages) > 1:
+        # Only one page is sent to the browser per rerun; the downloads hold the full text.
+        page = st.number_input(f"Page (of {len(pages)})", min_value=1, max_value=len(pages), value=1, step=1)
+        st.text_area("Transcript page", value=read_page(txt_path, pages[int(page) - 1]), height=300)
+    else:
+        st.text_area("Full transcript", value=read_page(txt_path, pages[0]), height=300)
 
     file_stem = st.session_state.get("last_file_stem", "transcript")
 
-    st.download_button(
-        label="Download .txt",
-        data=txt_bytes,
-        file_name=f"{file_stem}_transcript.txt",
-        mime="text/plain",
-    )
+    # The buttons read the exports straight from the result directory on each rerun.
+    with txt_path.open("rb") as txt_file:
+        st.download_button(
+            label="Download .txt",
+            data=txt_file,
+            file_name=f"{file_stem}_transcript.txt",
+            mime="text/plain",
+        )
 
-    st.download_button(
-        label="Download .json",
-        data=json_bytes,
-        file_name=f"{file_stem}_transcript.json",
-        mime="application/json",
-    )
+    with open(st.session_state["last_json_path"], "rb") as json_file:
+        st.download_button(
+            label="Download .json",
+            data=json_file,
+            file_name=f"{file_stem}_transcript.json",
+            mime="application/json",
+        )
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import convert
+from convert import AudioDecoder, FfmpegDecoder, InProcessDecoder
+from loadtest import synthesize_wav
+
+
+def _encode_m4a(source_wav: Path, target: Path) -> Path | None:
+    """Re-encode a WAV to AAC/M4A with PyAV so compressed input is covered too."""
+    if convert.av is None:
+        return None
+
+    av = convert.av
+    with av.open(str(source_wav)) as source, av.open(str(target), "w") as output:
+        in_stream = source.streams.audio[0]
+        out_stream = output.add_stream("aac", rate=in_stream.rate)
+        out_stream.layout = "mono"
+        for frame in source.decode(in_stream):
+            frame.pts = None
+            for packet in out_stream.encode(frame):
+                output.mux(packet)
+        for packet in out_stream.encode(None):
+            output.mux(packet)
+    return target
+
+
+def _encode_mp4(source_wav: Path, target: Path, seconds: float) -> Path | None:
+    """Mux a synthetic 720p video track next to AAC audio, as a phone recording would."""
+    if convert.av is None:
+        return None
+
+    av = convert.av
+    with av.open(str(source_wav)) as source, av.open(str(target), "w") as output:
+        in_audio = source.streams.audio[0]
+        video = output.add_stream("mpeg4", rate=25)
+        video.width, video.height, video.pix_fmt = 1280, 720, "yuv420p"
+        audio = output.add_stream("aac", rate=in_audio.rate)
+        audio.layout = "mono"
+
+        for index in range(int(seconds * 25)):
+            frame = av.VideoFrame(1280, 720, "yuv420p")
+            for plane in frame.planes:
+                plane.update(bytes([(index * 3) % 256]) * plane.buffer_size)
+            for packet in video.encode(frame):
+                output.mux(packet)
+        for packet in video.encode(None):
+            output.mux(packet)
+
+        for frame in source.decode(in_audio):
+            frame.pts = None
+            for packet in audio.encode(frame):
+                output.mux(packet)
+        for packet in audio.encode(None):
+            output.mux(packet)
+    return target
+
+
+def _available_backends() -> dict[str, AudioDecoder]:
+    backends: dict[str, AudioDecoder] = {}
+    if shutil.which("ffmpeg"):
+        backends["ffmpeg"] = FfmpegDecoder()
+        # Baseline without probing/stream selection, to measure the video fast path.
+        backends["ffmpeg-all-streams"] = FfmpegDecoder(select_streams=False)
+    if convert.av is not None:
+        backends["inprocess"] = InProcessDecoder()
+    return backends
+
+
+def bench(inputs: list[Path], backends: dict[str, AudioDecoder], repeats: int) -> list[dict]:
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="stt_bench_out_") as output_dir:
+        output = Path(output_dir) / "out.wav"
+        for source in inputs:
+            for name, backend in backends.items():
+                timings = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    backend.decode(source, output)
+                    timings.append(time.perf_counter() - started)
+                    output.unlink(missing_ok=True)
+                rows.append(
+                    {
+                        "input": source.name,
+                        "backend": name,
+                        "median_ms": statistics.median(timings) * 1000,
+                        "min_ms": min(timings) * 1000,
+                    }
+                )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare decoder backends on audio and video inputs.")
+    parser.add_argument("--short", type=float, default=2.0, help="Short clip length in seconds")
+    parser.add_argument("--long", type=float, default=600.0, help="Long clip length in seconds")
+    parser.add_argument("--video", type=float, default=30.0, help="Video clip length in seconds (0 to skip)")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    backends = _available_backends()
+    if not backends:
+        raise SystemExit("Neither ffmpeg nor PyAV is available; nothing to benchmark.")
+
+    with tempfile.TemporaryDirectory(prefix="stt_bench_") as temp_dir:
+        root = Path(temp_dir)
+        inputs: list[Path] = []
+        for label, seconds in (("short", args.short), ("long", args.long)):
+            # 44.1 kHz so every backend has to resample rather than pass through.
+            wav_path = synthesize_wav(root / f"{label}.wav", seconds, sample_rate=44100)
+            inputs.append(wav_path)
+            m4a_path = _encode_m4a(wav_path, root / f"{label}.m4a")
+            if m4a_path is not None:
+                inputs.append(m4a_path)
+
+        if args.video > 0:
+            audio_track = synthesize_wav(root / "video_audio.wav", args.video, sample_rate=44100)
+            mp4_path = _encode_mp4(audio_track, root / "video.mp4", args.video)
+            if mp4_path is not None:
+                inputs.append(mp4_path)
+
+        rows = bench(inputs, backends, args.repeats)
+
+    print(f"{'input':<12} {'backend':<20} {'median ms':>10} {'min ms':>10}")
+    for row in rows:
+        print(f"{row['input']:<12} {row['backend']:<20} {row['median_ms']:>10.1f} {row['min_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; checkpoints are then unlocked.
+    fcntl = None
+
+
+CHECKPOINT_VERSION = 2
+
+
+def _source_identity(fingerprint: str, save_words: bool, job: dict | None = None) -> dict:
+    # Keyed on the decoded audio, not the WAV's path or mtime: a retry usually
+    # re-converts the input into a fresh temp directory.
+    identity = {
+        "version": CHECKPOINT_VERSION,
+        "audio": fingerprint,
+        "save_words": save_words,
+    }
+    if job:
+        identity["job"] = job
+    return identity
+
+
+@contextmanager
+def checkpoint_lock(checkpoint_path: Path) -> Iterator[bool]:
+    """
+    Hold an advisory lock on a checkpoint for the duration of one job.
+
+    Yields False when another job (in this or another process) already holds
+    it; that job owns the log and the caller should run without it. The lock
+    goes away with the process, so a crashed job never blocks its retry.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    lock_path = Path(checkpoint_path).with_name(Path(checkpoint_path).name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as handle:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def load_checkpoint(
+    checkpoint_path: Path,
+    fingerprint: str,
+    save_words: bool,
+    job: dict | None = None,
+) -> tuple[list[dict], int]:
+    """
+    Read the committed progress recorded for the audio with ``fingerprint``.
+
+    ``job`` holds any further options the checkpoint must match, such as a
+    time range.
+
+    Returns:
+        The finalized chunks (with absolute timestamps) and the frame to resume
+        from. A missing, unreadable or foreign checkpoint yields ``([], 0)``.
+    """
+    try:
+        lines = Path(checkpoint_path).read_text(encoding="utf-8").splitlines()
+    except (OSError, UnicodeDecodeError):
+        return [], 0
+
+    if not lines:
+        return [], 0
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return [], 0
+    if header != _source_identity(fingerprint, save_words, job):
+        return [], 0
+
+    committed: list[dict] = []
+    pending: list[dict] = []
+    frame = 0
+
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # Torn write from a crash: everything after it is uncommitted.
+            break
+        if "chunk" in entry:
+            pending.append(entry["chunk"])
+        elif "frame" in entry:
+            committed.extend(pending)
+            pending = []
+            frame = int(entry["frame"])
+
+    return committed, frame
+
+
+class CheckpointWriter:
+    """
+    Append-only, fsync'd log of finalized chunks and resume frame offsets.
+
+    Chunks are only considered committed once a following ``frame`` marker
+    has been written and synced, so a crash mid-write never resumes from a
+    position whose results were lost.
+    """
+
+    def __init__(
+        self,
+        checkpoint_path: Path,
+        fingerprint: str,
+        save_words: bool,
+        committed_chunks: list[dict] | None = None,
+        frame: int = 0,
+        job: dict | None = None,
+    ) -> None:
+        self.path = Path(checkpoint_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Rewrite rather than append so a torn tail from a previous crash is dropped.
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        self._handle: TextIO = temp_path.open("w", encoding="utf-8")
+        self._handle.write(json.dumps(_source_identity(fingerprint, save_words, job)) + "\n")
+        if committed_chunks or frame:
+            self.commit(committed_chunks or [], frame)
+        else:
+            self._sync()
+        self._handle.close()
+        os.replace(temp_path, self.path)
+
+        self._handle = self.path.open("a", encoding="utf-8")
+
+    def _sync(self) -> None:
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def commit(self, chunks: list[dict], frame: int) -> None:
+        for chunk in chunks:
+            self._handle.write(json.dumps({"chunk": chunk}, ensure_ascii=False) + "\n")
+        self._handle.write(json.dumps({"frame": frame}) + "\n")
+        self._sync()
+
+    def close(self, remove: bool = False) -> None:
+        self._handle.close()
+        if remove:
+            self.path.unlink(missing_ok=True)
@@ -1,49 +1,353 @@
 from __future__ import annotations
 
+import json
+import os
+import shutil
 import subprocess
 import tempfile
+import wave
+from abc import ABC, abstractmethod
 from pathlib import Path
 
+from profiling import profiled
+from scheduler import get_scheduler
 
-def convert_to_wav(input_path: Path) -> Path:
-    source_path = Path(input_path)
+try:
+    import av
+except ImportError:  # PyAV is optional; ffmpeg remains the default backend.
+    av = None
 
-    if not source_path.exists() or not source_path.is_file():
-        raise FileNotFoundError(f"Input audio file not found: {source_path}")
 
-    temp_dir = Path(tempfile.mkdtemp(prefix="stt_audio_"))
-    output_path = temp_dir / f"{source_path.stem}_16k_mono.wav"
+TARGET_SAMPLE_RATE = 16000
+DECODER_CHOICES = ("auto", "ffmpeg", "inprocess")
+# Containers that usually carry video; probing first lets ffmpeg skip those streams.
+VIDEO_CONTAINER_SUFFIXES = {".mp4", ".mov", ".m4v", ".mkv", ".webm", ".avi"}
+
 
+def probe_streams(source_path: Path) -> list[dict] | None:
+    """
+    List the streams of a media file with ffprobe.
+
+    Returns:
+        One dict per stream (``index``, ``codec_type``, ``codec_name``,
+        ``sample_rate``, ``channels``), or None if the file could not be probed
+    """
     command = [
-        "ffmpeg",
-        "-y",
-        "-i",
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "stream=index,codec_type,codec_name,sample_rate,channels",
+        "-of",
+        "json",
         str(source_path),
-        "-ac",
-        "1",
-        "-ar",
-        "16000",
-        "-c:a",
-        "pcm_s16le",
-        str(output_path),
     ]
 
     try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-    except FileNotFoundError as exc:
-        raise RuntimeError(
-            "ffmpeg is not installed or not available on PATH."
-        ) from exc
+        result = subprocess.run(command, capture_output=True, text=True, check=False)
+    except FileNotFoundError:
+        return None
 
     if result.returncode != 0:
-        raise RuntimeError(f"ffmpeg conversion failed: {result.stderr.strip()}")
+        return None
+
+    try:
+        streams = json.loads(result.stdout).get("streams")
+    except ValueError:
+        return None
+
+    return streams if isinstance(streams, list) else None
+
+
+class AudioDecoder(ABC):
+    """Decode any supported input into a mono 16-bit PCM WAV file."""
+
+    name = "base"
+
+    @abstractmethod
+    def decode(
+        self,
+        source_path: Path,
+        output_path: Path,
+        start: float | None = None,
+        end: float | None = None,
+        sample_rate: int = TARGET_SAMPLE_RATE,
+    ) -> None:
+        """Decode ``source_path`` at ``sample_rate``, optionally only the ``start``..``end`` window in seconds."""
+
+
+class FfmpegDecoder(AudioDecoder):
+    """Spawn an ``ffmpeg`` process per conversion."""
+
+    name = "ffmpeg"
+
+    def __init__(self, select_streams: bool = True) -> None:
+        self.select_streams = select_streams
+
+    def _stream_arguments(self, source_path: Path) -> tuple[list[str], dict | None]:
+        if not self.select_streams or source_path.suffix.lower() not in VIDEO_CONTAINER_SUFFIXES:
+            return [], None
+
+        streams = probe_streams(source_path)
+        if streams is None:
+            # Unknown layout (or no ffprobe): let ffmpeg pick streams itself.
+            return [], None
+
+        audio = [stream for stream in streams if stream.get("codec_type") == "audio"]
+        if not audio:
+            raise RuntimeError("Input file contains no audio stream.")
+
+        # First audio stream only; drop video, subtitle and data streams before decoding.
+        return ["-map", "0:a:0", "-vn", "-sn", "-dn"], audio[0]
+
+    @staticmethod
+    def _codec_arguments(audio_stream: dict | None, sample_rate: int = TARGET_SAMPLE_RATE) -> list[str]:
+        if (
+            audio_stream is not None
+            and audio_stream.get("codec_name") == "pcm_s16le"
+            and int(audio_stream.get("channels") or 0) == 1
+            and int(audio_stream.get("sample_rate") or 0) == sample_rate
+        ):
+            # Already the recognizer's format: remux without decoding.
+            return ["-c:a", "copy"]
+        return ["-ac", "1", "-ar", str(sample_rate), "-c:a", "pcm_s16le"]
+
+    @staticmethod
+    def _range_arguments(start: float | None, end: float | None) -> tuple[list[str], list[str]]:
+        # -ss before -i seeks the input instead of decoding and discarding up to start.
+        before_input = ["-ss", f"{start:.3f}"] if start else []
+        after_input = ["-t", f"{end - (start or 0.0):.3f}"] if end is not None else []
+        return before_input, after_input
+
+    def decode(
+        self,
+        source_path: Path,
+        output_path: Path,
+        start: float | None = None,
+        end: float | None = None,
+        sample_rate: int = TARGET_SAMPLE_RATE,
+    ) -> None:
+        stream_arguments, audio_stream = self._stream_arguments(source_path)
+        before_input, after_input = self._range_arguments(start, end)
+        command = [
+            "ffmpeg",
+            "-y",
+            *before_input,
+            "-i",
+            str(source_path),
+            *after_input,
+            *stream_arguments,
+            *self._codec_arguments(audio_stream, sample_rate),
+            str(output_path),
+        ]
+
+        try:
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except FileNotFoundError as exc:
+            raise RuntimeError(
+                "ffmpeg is not installed or not available on PATH."
+            ) from exc
+
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg conversion failed: {result.stderr.strip()}")
+
+        if not output_path.exists():
+            raise RuntimeError("ffmpeg reported success but no output file was created.")
+
+
+class InProcessDecoder(AudioDecoder):
+    """
+    Decode and resample inside this process with PyAV (libav bindings).
+
+    Avoids the fork/exec and stderr round trip of the ffmpeg backend, which
+    dominates for short clips. Note that pydub is not an option here: it
+    shells out to ffmpeg for everything except WAV.
+    """
+
+    name = "inprocess"
+
+    def decode(
+        self,
+        source_path: Path,
+        output_path: Path,
+        start: float | None = None,
+        end: float | None = None,
+        sample_rate: int = TARGET_SAMPLE_RATE,
+    ) -> None:
+        if av is None:
+            raise RuntimeError("In-process decoding requires PyAV (pip install av).")
+
+        try:
+            with av.open(str(source_path)) as container:
+                stream = next((item for item in container.streams if item.type == "audio"), None)
+                if stream is None:
+                    raise RuntimeError("Input file contains no audio stream.")
+
+                if start and stream.time_base is not None:
+                    # Lands on the last seek point at or before start; the rest is trimmed below.
+                    container.seek(int(start / stream.time_base), stream=stream)
+
+                resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+                window = _SampleWindow(start, end, sample_rate)
+                with wave.open(str(output_path), "wb") as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(sample_rate)
+
+                    for frame in container.decode(stream):
+                        window.observe(frame)
+                        for resampled in resampler.resample(frame):
+                            wav_file.writeframes(window.clip(_frame_bytes(resampled)))
+                        if window.done:
+                            break
+                    else:
+                        for resampled in resampler.resample(None):
+                            wav_file.writeframes(window.clip(_frame_bytes(resampled)))
+        except av.FFmpegError as exc:
+            raise RuntimeError(f"In-process decoding failed: {exc}") from exc
+
+
+class _SampleWindow:
+    """Trim resampled PCM to a [start, end) window with sample accuracy."""
+
+    def __init__(self, start: float | None, end: float | None, sample_rate: int = TARGET_SAMPLE_RATE) -> None:
+        self.start = start or 0.0
+        self.end = end
+        self.sample_rate = sample_rate
+        self._skip: int | None = None if start else 0
+        self._remaining = (
+            int(round((end - self.start) * sample_rate)) if end is not None else None
+        )
+
+    @property
+    def done(self) -> bool:
+        return self._remaining is not None and self._remaining <= 0
+
+    def observe(self, frame) -> None:
+        if self._skip is None:
+            # Seeking is keyframe-granular; drop whatever precedes the requested start.
+            decoded_from = frame.time if frame.time is not None else self.start
+            self._skip = max(0, int(round((self.start - decoded_from) * self.sample_rate)))
+
+    def clip(self, pcm: bytes) -> bytes:
+        skip_bytes = min(len(pcm), (self._skip or 0) * 2)
+        if skip_bytes:
+            self._skip -= skip_bytes // 2
+            pcm = pcm[skip_bytes:]
+        if self._remaining is not None:
+            pcm = pcm[: max(0, self._remaining) * 2]
+            self._remaining -= len(pcm) // 2
+        return pcm
+
+
+def _frame_bytes(frame) -> bytes:
+    # Plane buffers can be padded past the last sample.
+    return bytes(frame.planes[0])[: frame.samples * 2]
+
+
+def _is_normalized_wav(source_path: Path, sample_rate: int = TARGET_SAMPLE_RATE) -> bool:
+    if source_path.suffix.lower() != ".wav":
+        return False
+    try:
+        with wave.open(str(source_path), "rb") as wav_file:
+            return (
+                wav_file.getnchannels() == 1
+                and wav_file.getsampwidth() == 2
+                and wav_file.getframerate() == sample_rate
+                and wav_file.getcomptype() == "NONE"
+            )
+    except (wave.Error, EOFError):
+        return False
+
+
+def _copy_wav_range(source_path: Path, output_path: Path, start: float | None, end: float | None) -> None:
+    with wave.open(str(source_path), "rb") as source, wave.open(str(output_path), "wb") as target:
+        rate = source.getframerate()
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(rate)
+
+        total = source.getnframes()
+        first = min(int((start or 0.0) * rate), total)
+        last = min(int(end * rate), total) if end is not None else total
+        source.setpos(first)
+
+        remaining = max(0, last - first)
+        while remaining > 0:
+            data = source.readframes(min(remaining, 1 << 16))
+            if not data:
+                break
+            target.writeframes(data)
+            remaining -= len(data) // 2
+
+
+def _validate_range(start: float | None, end: float | None) -> None:
+    if start is not None and start < 0:
+        raise ValueError("start must be zero or positive.")
+    if end is not None and end <= (start or 0.0):
+        raise ValueError("end must be greater than start.")
+
+
+def get_decoder(name: str | None = None) -> AudioDecoder:
+    """
+    Pick a decoder backend by name or from ``STT_DECODER``.
+
+    ``auto`` (the default) uses the in-process backend when PyAV is
+    installed and falls back to spawning ffmpeg otherwise. The video
+    handling of ``FfmpegDecoder`` (ffprobe, first audio stream only, PCM
+    stream copy) therefore only applies with ``STT_DECODER=ffmpeg`` or
+    without PyAV.
+    """
+    choice = (name or os.getenv("STT_DECODER") or "auto").strip().lower()
+    if choice not in DECODER_CHOICES:
+        raise ValueError(f"Unknown decoder {choice!r}; expected one of {', '.join(DECODER_CHOICES)}.")
+
+    if choice == "ffmpeg" or (choice == "auto" and av is None):
+        return FfmpegDecoder()
+    return InProcessDecoder()
+
+
+@profiled("convert_to_wav")
+def convert_to_wav(
+    input_path: Path,
+    decoder: str | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    sample_rate: int | None = None,
+) -> Path:
+    """
+    Convert any supported input to a mono 16-bit PCM WAV for the recognizer.
+
+    ``sample_rate`` should be the model's own rate (``core.get_model_sample_rate()``)
+    so audio is converted once, straight to what the recognizer consumes; it
+    defaults to 16 kHz.
+    """
+    source_path = Path(input_path)
+    sample_rate = sample_rate or TARGET_SAMPLE_RATE
+
+    if not source_path.exists() or not source_path.is_file():
+        raise FileNotFoundError(f"Input audio file not found: {source_path}")
+
+    _validate_range(start, end)
+
+    temp_dir = Path(tempfile.mkdtemp(prefix="stt_audio_"))
+    output_path = temp_dir / f"{source_path.stem}_{sample_rate // 1000}k_mono.wav"
+
+    # Already in the recognizer's format: no decode needed at all.
+    if _is_normalized_wav(source_path, sample_rate):
+        if start is None and end is None:
+            shutil.copyfile(source_path, output_path)
+        else:
+            _copy_wav_range(source_path, output_path, start, end)
+        return output_path
 
-    if not output_path.exists():
-        raise RuntimeError("ffmpeg reported success but no output file was created.")
+    backend = get_decoder(decoder)
+    with get_scheduler().decode_slot():
+        backend.decode(source_path, output_path, start=start, end=end, sample_rate=sample_rate)
 
     return output_path
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import threading
 import wave
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
+from typing import Iterator
 
 from vosk import KaldiRecognizer, Model
 
+from checkpoint import CheckpointWriter, checkpoint_lock, load_checkpoint
+from profiling import profiled
+from results_store import JsonlResultStore
+from scheduler import get_scheduler
+
+
+DEFAULT_SAMPLE_RATE = 16000
+# Feature configs that carry --sample-frequency, in the order Vosk models ship them.
+_FEATURE_CONFIGS = ("mfcc.conf", "fbank.conf", "plp.conf")
+FINGERPRINT_CHUNK_FRAMES = 1 << 16
 
 _model_instance: Model | None = None
+_models_by_path: dict[str, Model] = {}
+_sample_rates: dict[str, int] = {}
 _model_lock = threading.Lock()
 
 
@@ -18,24 +33,69 @@ def _resolve_model_path() -> Path:
     return Path(model_path)
 
 
-def get_model() -> Model:
+def read_model_sample_rate(model_path: Path) -> int:
+    """
+    Read the sample frequency a model was trained on from its ``conf`` directory.
+
+    Falls back to 16 kHz when the model has no feature config or does not set
+    ``--sample-frequency`` (Kaldi's own default is 16 kHz too).
+    """
+    conf_dir = Path(model_path) / "conf"
+    for name in _FEATURE_CONFIGS:
+        try:
+            lines = (conf_dir / name).read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            option, _, value = line.split("#", 1)[0].strip().partition("=")
+            if option == "--sample-frequency":
+                try:
+                    return int(float(value))
+                except ValueError as exc:
+                    raise ValueError(f"Invalid --sample-frequency in {conf_dir / name}: {value!r}") from exc
+    return DEFAULT_SAMPLE_RATE
+
+
+def _load_model(model_path: Path) -> Model:
+    if not model_path.exists() or not model_path.is_dir():
+        raise FileNotFoundError(
+            f"Vosk model directory not found: {model_path}. "
+            "Set VOSK_MODEL_PATH or place a model in ./model"
+        )
+    _sample_rates[str(model_path.resolve())] = read_model_sample_rate(model_path)
+    return Model(str(model_path))
+
+
+def get_model(model_path: Path | None = None) -> Model:
     global _model_instance
 
+    if model_path is not None:
+        key = str(Path(model_path).resolve())
+        if key not in _models_by_path:
+            with _model_lock:
+                if key not in _models_by_path:
+                    _models_by_path[key] = _load_model(Path(model_path))
+        return _models_by_path[key]
+
     if _model_instance is None:
         with _model_lock:
             if _model_instance is None:
-                model_path = _resolve_model_path()
-                if not model_path.exists() or not model_path.is_dir():
-                    raise FileNotFoundError(
-                        f"Vosk model directory not found: {model_path}. "
-                        "Set VOSK_MODEL_PATH or place a model in ./model"
-                    )
-                _model_instance = Model(str(model_path))
+                _model_instance = _load_model(_resolve_model_path())
 
     return _model_instance
 
 
-def transcribe_file(wav_path: Path, save_words: bool = False) -> dict:
+def get_model_sample_rate(model_path: Path | None = None) -> int:
+    """Sample rate the model (by default the shared one) expects audio to be converted to."""
+    path = Path(model_path) if model_path is not None else _resolve_model_path()
+    key = str(path.resolve())
+    if key not in _sample_rates:
+        _sample_rates[key] = read_model_sample_rate(path)
+    return _sample_rates[key]
+
+
+@contextmanager
+def open_pcm_wav(wav_path: Path) -> Iterator[wave.Wave_read]:
     source_path = Path(wav_path)
 
     if not source_path.exists() or not source_path.is_file():
@@ -49,20 +109,183 @@ def transcribe_file(wav_path: Path, save_words: bool = False) -> dict:
         if wav_file.getcomptype() != "NONE":
             raise ValueError("WAV file must be uncompressed PCM.")
 
-        recognizer = KaldiRecognizer(get_model(), wav_file.getframerate())
-        recognizer.SetWords(save_words)
+        yield wav_file
 
-        final_chunks: list[dict] = []
 
+def pcm_fingerprint(wav_path: Path) -> str:
+    """
+    Hash the decoded PCM samples of a normalized WAV, ignoring its header.
+
+    The same recording delivered in different containers or with different
+    metadata decodes to the same samples, so it gets the same fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+
+    with open_pcm_wav(wav_path) as wav_file:
+        digest.update(f"{wav_file.getframerate()}:{wav_file.getsampwidth()}:".encode("ascii"))
         while True:
-            data = wav_file.readframes(4000)
-            if len(data) == 0:
+            data = wav_file.readframes(FINGERPRINT_CHUNK_FRAMES)
+            if not data:
                 break
+            digest.update(data)
+
+    return digest.hexdigest()
+
+
+def _iter_results(
+    recognizer: KaldiRecognizer,
+    wav_file: wave.Wave_read,
+    frame_count: int | None = None,
+) -> Iterator[tuple[dict, int | None]]:
+    """
+    Feed a WAV to the recognizer and yield each finalized chunk as it is produced.
+
+    Each chunk comes with the frame it was finalized at, which is a safe resume
+    point because the recognizer has no pending audio there; the trailing
+    ``FinalResult`` chunk comes with None.
+    """
+    remaining = frame_count
+
+    while remaining is None or remaining > 0:
+        to_read = 4000 if remaining is None else min(4000, remaining)
+        data = wav_file.readframes(to_read)
+        if len(data) == 0:
+            break
+        if remaining is not None:
+            remaining -= len(data) // wav_file.getsampwidth()
+
+        if recognizer.AcceptWaveform(data):
+            yield json.loads(recognizer.Result()), wav_file.tell()
+
+    yield json.loads(recognizer.FinalResult()), None
+
+
+def _recognize(
+    recognizer: KaldiRecognizer,
+    wav_file: wave.Wave_read,
+    frame_count: int | None = None,
+) -> list[dict]:
+    return [chunk for chunk, _ in _iter_results(recognizer, wav_file, frame_count)]
+
+
+def offset_words(words: list[dict], seconds: float) -> list[dict]:
+    if not seconds:
+        return words
+
+    shifted: list[dict] = []
+    for word in words:
+        moved = dict(word)
+        for key in ("start", "end"):
+            if isinstance(moved.get(key), (int, float)):
+                moved[key] = round(moved[key] + seconds, 6)
+        shifted.append(moved)
+    return shifted
+
+
+def _offset_chunk(chunk: dict, seconds: float) -> dict:
+    if not seconds or not isinstance(chunk.get("result"), list):
+        return chunk
+    return {**chunk, "result": offset_words(chunk["result"], seconds)}
+
+
+@profiled("transcribe_file")
+def transcribe_file(
+    wav_path: Path,
+    save_words: bool = False,
+    checkpoint_path: Path | None = None,
+    checkpoint_interval: float = 60.0,
+    start: float | None = None,
+    end: float | None = None,
+    time_offset: float = 0.0,
+    result_store: JsonlResultStore | None = None,
+    fingerprint: str | None = None,
+) -> dict:
+    """
+    Transcribe a mono 16-bit PCM WAV file with the shared Vosk model.
+
+    ``start``/``end`` (seconds) restrict decoding to a window of the file,
+    which is reached by seeking rather than decoding from frame 0. Word
+    timestamps are reported in absolute time: relative to the start of the
+    file, plus ``time_offset`` for WAVs that are themselves an excerpt (for
+    example produced by ``convert_to_wav(..., start=...)``).
+
+    With ``checkpoint_path``, finalized results and the resume frame are
+    committed every ``checkpoint_interval`` seconds of audio, and a later call
+    with the same path continues from the last checkpoint. Checkpoints are
+    matched on the audio samples, so a retry that re-converted the input to a
+    new WAV still resumes. If another job is already using the checkpoint,
+    this call runs without one. Callers that already hashed the audio pass
+    its ``pcm_fingerprint`` as ``fingerprint`` so the file is not read twice.
+
+    With ``result_store``, each finalized chunk is appended to the store as
+    soon as the recognizer produces it and only the text is kept in memory;
+    the response then carries no ``result`` list and word timings are read
+    back from the store.
+    """
+    if start is not None and start < 0:
+        raise ValueError("start must be zero or positive.")
+    if end is not None and end <= (start or 0.0):
+        raise ValueError("end must be greater than start.")
+
+    final_chunks: list[dict] = []
+    checkpoint: CheckpointWriter | None = None
+
+    def emit(chunk: dict) -> None:
+        if result_store is not None:
+            result_store.append(chunk)
+            chunk = {"text": chunk.get("text", "")}
+        final_chunks.append(chunk)
+
+    with ExitStack() as stack:
+        if checkpoint_path is not None and not stack.enter_context(checkpoint_lock(checkpoint_path)):
+            checkpoint_path = None
+        if checkpoint_path is not None and fingerprint is None:
+            fingerprint = pcm_fingerprint(wav_path)
+        wav_file = stack.enter_context(open_pcm_wav(wav_path))
+
+        rate = wav_file.getframerate()
+        total_frames = wav_file.getnframes()
+        first_frame = min(int((start or 0.0) * rate), total_frames)
+        last_frame = min(int(end * rate), total_frames) if end is not None else None
+        start_frame = first_frame
+
+        if checkpoint_path is not None:
+            job = {"start": start, "end": end, "time_offset": time_offset} if (start or end or time_offset) else None
+            resumed_chunks, resume_frame = load_checkpoint(checkpoint_path, fingerprint, save_words, job)
+            start_frame = max(first_frame, resume_frame)
+            checkpoint = CheckpointWriter(checkpoint_path, fingerprint, save_words, resumed_chunks, start_frame, job)
+            for chunk in resumed_chunks:
+                emit(chunk)
+
+        wav_file.setpos(start_frame)
+
+        # The recognizer's clock starts at zero wherever decoding begins; shift words to absolute time.
+        offset = start_frame / rate + time_offset
+        frame_count = max(0, last_frame - start_frame) if last_frame is not None else None
+        pending: list[dict] = []
+        last_saved = start_frame
 
-            if recognizer.AcceptWaveform(data):
-                final_chunks.append(json.loads(recognizer.Result()))
+        try:
+            with get_scheduler().recognition_slot(_resolve_model_path()):
+                recognizer = KaldiRecognizer(get_model(), rate)
+                recognizer.SetWords(save_words)
+                for chunk, frame in _iter_results(recognizer, wav_file, frame_count):
+                    chunk = _offset_chunk(chunk, offset)
+                    emit(chunk)
+                    if checkpoint is None or frame is None:
+                        continue
+                    pending.append(chunk)
+                    if frame - last_saved >= checkpoint_interval * rate:
+                        checkpoint.commit(pending, frame)
+                        pending.clear()
+                        last_saved = frame
+        except BaseException:
+            if checkpoint is not None:
+                checkpoint.close()
+            raise
 
-        final_chunks.append(json.loads(recognizer.FinalResult()))
+        if checkpoint is not None:
+            checkpoint.close(remove=True)
 
     text = " ".join(
         chunk.get("text", "").strip()
@@ -72,7 +295,7 @@ def transcribe_file(wav_path: Path, save_words: bool = False) -> dict:
 
     response = {"text": text}
 
-    if save_words:
+    if save_words and result_store is None:
         words: list[dict] = []
         for chunk in final_chunks:
             chunk_words = chunk.get("result")
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from core import _resolve_model_path, offset_words, pcm_fingerprint, transcribe_file
+from results_store import JsonlResultStore, write_json_export
+
+
+def _model_tag() -> str:
+    model_path = str(_resolve_model_path().resolve())
+    return hashlib.blake2b(model_path.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class TranscriptCache:
+    """Transcripts stored on disk by PCM fingerprint and recognition model."""
+
+    def __init__(self, cache_dir: Path | None = None) -> None:
+        configured = os.getenv("STT_TRANSCRIPT_CACHE_DIR")
+        if cache_dir is not None:
+            self.root = Path(cache_dir)
+        elif configured:
+            self.root = Path(configured)
+        else:
+            self.root = Path(tempfile.gettempdir()) / "simpletext2speech_transcripts"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, fingerprint: str, save_words: bool) -> Path:
+        suffix = "words" if save_words else "text"
+        return self.root / f"{fingerprint}_{_model_tag()}_{suffix}.json"
+
+    def checkpoint_path(self, fingerprint: str, save_words: bool) -> Path:
+        """Where an unfinished transcription of this audio records its progress."""
+        return self._entry_path(fingerprint, save_words).with_suffix(".checkpoint")
+
+    def get(self, fingerprint: str, save_words: bool = False) -> dict | None:
+        candidates = [self._entry_path(fingerprint, True)]
+        if not save_words:
+            candidates.append(self._entry_path(fingerprint, False))
+
+        for candidate in candidates:
+            try:
+                transcription = json.loads(candidate.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if not save_words:
+                # A word-level entry also answers a text-only request.
+                transcription.pop("result", None)
+            return transcription
+
+        return None
+
+    def put(
+        self,
+        fingerprint: str,
+        save_words: bool,
+        transcription: dict,
+        words: Iterable[dict] | None = None,
+    ) -> None:
+        """Store a transcript; ``words`` streams word timings instead of ``transcription["result"]``."""
+        target = self._entry_path(fingerprint, save_words)
+        # A temp file of our own: concurrent sessions may store the same audio at once.
+        handle, temp_name = tempfile.mkstemp(dir=self.root, prefix=f"{target.stem}.", suffix=".tmp")
+        os.close(handle)
+        temp_path = Path(temp_name)
+        if words is None:
+            words = transcription.get("result")
+        try:
+            write_json_export(transcription.get("text", ""), words, temp_path)
+            os.replace(temp_path, target)
+        except OSError:
+            # Whoever else wrote this entry stored the same transcript; the cache is best effort.
+            temp_path.unlink(missing_ok=True)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+
+def _shifted(transcription: dict, time_offset: float) -> dict:
+    if time_offset and isinstance(transcription.get("result"), list):
+        return {**transcription, "result": offset_words(transcription["result"], time_offset)}
+    return transcription
+
+
+def _iter_shifted(words: Iterable[dict], seconds: float) -> Iterator[dict]:
+    for word in words:
+        yield from offset_words([word], seconds)
+
+
+def transcribe_deduplicated(
+    wav_path: Path,
+    save_words: bool = False,
+    cache: TranscriptCache | None = None,
+    time_offset: float = 0.0,
+    result_store: JsonlResultStore | None = None,
+) -> tuple[dict, bool]:
+    """
+    Transcribe a normalized WAV unless the same audio was already transcribed.
+
+    Transcripts are stored relative to the start of the WAV; ``time_offset``
+    is applied on the way out so excerpts of longer recordings report
+    absolute word times. With ``result_store``, word timings go to the store
+    (as with ``transcribe_file``) and the returned dict only carries the text.
+
+    Progress is checkpointed next to the cache entry, so a transcription
+    interrupted by a crash or restart resumes when the same audio comes back.
+
+    Returns:
+        The transcription and whether it came from the cache
+    """
+    cache = cache or TranscriptCache()
+    fingerprint = pcm_fingerprint(wav_path)
+
+    cached = cache.get(fingerprint, save_words)
+    if cached is not None:
+        cached = _shifted(cached, time_offset)
+        if result_store is None:
+            return cached, True
+        result_store.append(cached)
+        return {"text": cached.get("text", "")}, True
+
+    if result_store is None:
+        transcription = transcribe_file(
+            wav_path,
+            save_words=save_words,
+            checkpoint_path=cache.checkpoint_path(fingerprint, save_words),
+            fingerprint=fingerprint,
+        )
+        cache.put(fingerprint, save_words, transcription)
+        return _shifted(transcription, time_offset), False
+
+    transcription = transcribe_file(
+        wav_path,
+        save_words=save_words,
+        time_offset=time_offset,
+        result_store=result_store,
+        checkpoint_path=cache.checkpoint_path(fingerprint, save_words),
+        fingerprint=fingerprint,
+    )
+    words = _iter_shifted(result_store.iter_words(), -time_offset) if save_words else None
+    cache.put(fingerprint, save_words, transcription, words=words)
+    return transcription, False
@@ -8,6 +8,8 @@ from urllib.parse import urlparse, parse_qs
 import gdown
 import requests
 
+from profiling import profiled
+
 
 def _convert_google_drive_url(url: str) -> str:
     """
@@ -35,6 +37,7 @@ def _convert_google_drive_url(url: str) -> str:
     return url
 
 
+@profiled("download_from_url")
 def download_from_url(url: str, chunk_size: int = 8192) -> Path:
     """
     Download a file from a URL to a temporary location.
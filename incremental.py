@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+from vosk import KaldiRecognizer
+
+from core import _resolve_model_path, get_model
+from scheduler import get_scheduler
+
+
+READ_CHUNK_BYTES = 8000
+# Recorders often leave these placeholders in the header until the file is closed.
+UNKNOWN_DATA_SIZES = (0, 0xFFFFFFFF)
+# Recordings not refreshed for this long are dropped with their recognizer.
+DEFAULT_IDLE_TIMEOUT = 600.0
+# How many dropped paths are remembered so their next delta can say "reset".
+FORGOTTEN_PATHS_LIMIT = 4096
+
+
+@dataclass
+class _PathState:
+    identity: tuple[int, int]
+    sample_rate: int
+    data_offset: int
+    recognizer: KaldiRecognizer
+    consumed_bytes: int = 0
+    final_chunks: list[dict] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _read_pcm_header(handle: BinaryIO) -> tuple[int, int, int] | None:
+    """Return (sample_rate, data_offset, declared_data_size), or None if the header is incomplete."""
+    riff = handle.read(12)
+    if len(riff) < 12:
+        return None
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("File is not a RIFF/WAVE file.")
+
+    sample_rate: int | None = None
+    while True:
+        header = handle.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+        if chunk_id == b"fmt ":
+            fmt = handle.read(chunk_size)
+            if len(fmt) < 16:
+                return None
+            audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+            if audio_format != 1:
+                raise ValueError("WAV file must be uncompressed PCM.")
+            if channels != 1:
+                raise ValueError("WAV file must be mono (1 channel).")
+            if bits != 16:
+                raise ValueError("WAV file must be 16-bit PCM (sample width = 2).")
+            sample_rate = rate
+            if chunk_size & 1:
+                handle.seek(1, os.SEEK_CUR)
+            continue
+
+        if chunk_id == b"data":
+            if sample_rate is None:
+                raise ValueError("WAV data chunk precedes its fmt chunk.")
+            return sample_rate, handle.tell(), chunk_size
+
+        handle.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _chunk_words(chunks: list[dict]) -> list[dict]:
+    words: list[dict] = []
+    for chunk in chunks:
+        chunk_words = chunk.get("result")
+        if isinstance(chunk_words, list):
+            words.extend(chunk_words)
+    return words
+
+
+def _chunk_text(chunks: list[dict]) -> str:
+    return " ".join(
+        chunk.get("text", "").strip()
+        for chunk in chunks
+        if chunk.get("text", "").strip()
+    ).strip()
+
+
+class IncrementalTranscriber:
+    """
+    Transcribe WAV files that are still being written, one appended slice at a time.
+
+    Each path keeps a live recognizer, the PCM byte offset already decoded and
+    the finalized results, so a refresh only decodes audio appended since the
+    previous call. Word timestamps stay absolute because the recognizer is
+    never restarted for a path.
+
+    Different paths are decoded concurrently; calls for the same path are
+    serialized. Paths not refreshed for ``idle_timeout`` seconds are dropped.
+    When a path has to start over (the file was replaced or truncated, or it
+    was dropped), the next delta has ``reset`` set and covers the recording
+    from its beginning, so callers must discard the text they accumulated.
+    """
+
+    def __init__(self, save_words: bool = False, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        self.save_words = save_words
+        self.idle_timeout = idle_timeout
+        self._states: dict[str, _PathState] = {}
+        self._path_locks: dict[str, threading.Lock] = {}
+        self._forgotten: dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def _path_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(key, threading.Lock())
+
+    def _forget(self, key: str) -> None:
+        # Caller holds self._lock.
+        self._states.pop(key, None)
+        self._forgotten[key] = None
+        while len(self._forgotten) > FORGOTTEN_PATHS_LIMIT:
+            self._forgotten.pop(next(iter(self._forgotten)))
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for key, state in list(self._states.items()):
+                path_lock = self._path_locks.get(key)
+                if state.last_used < cutoff and (path_lock is None or not path_lock.locked()):
+                    self._forget(key)
+                    self._path_locks.pop(key, None)
+
+    def _state_for(self, key: str, handle: BinaryIO) -> tuple[_PathState | None, bool]:
+        """Return the path's state (None until the header is complete) and whether it restarted."""
+        stat = os.fstat(handle.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+
+        with self._lock:
+            state = self._states.get(key)
+            reset = key in self._forgotten
+            if state is not None:
+                truncated = stat.st_size < state.data_offset + state.consumed_bytes
+                if state.identity == identity and not truncated:
+                    return state, False
+                # Replaced or truncated recording: start over.
+                self._forget(key)
+                reset = True
+
+        parsed = _read_pcm_header(handle)
+        if parsed is None:
+            return None, reset
+        sample_rate, data_offset, _ = parsed
+
+        recognizer = KaldiRecognizer(get_model(), sample_rate)
+        recognizer.SetWords(self.save_words)
+        state = _PathState(identity, sample_rate, data_offset, recognizer)
+        with self._lock:
+            self._states[key] = state
+            self._forgotten.pop(key, None)
+        return state, reset
+
+    def _delta(
+        self,
+        chunks: list[dict],
+        state: _PathState | None,
+        partial: str = "",
+        reset: bool = False,
+    ) -> dict:
+        delta = {
+            "reset": reset,
+            "text": _chunk_text(chunks),
+            "partial": partial,
+            "processed_seconds": (
+                state.consumed_bytes / 2 / state.sample_rate if state is not None else 0.0
+            ),
+        }
+        if self.save_words:
+            delta["result"] = _chunk_words(chunks)
+        return delta
+
+    def update(self, wav_path: Path) -> dict:
+        """
+        Decode PCM appended to ``wav_path`` since the previous call.
+
+        Returns:
+            ``text`` (and ``result`` with words) for newly finalized utterances,
+            the in-progress ``partial`` text, the total ``processed_seconds``
+            and ``reset``, set when decoding restarted from the beginning
+
+        Raises:
+            FileNotFoundError: If the WAV file does not exist
+            ValueError: If the file is not mono 16-bit PCM WAV
+        """
+        source_path = Path(wav_path)
+        if not source_path.exists() or not source_path.is_file():
+            raise FileNotFoundError(f"WAV file not found: {source_path}")
+
+        self._evict_idle()
+        key = str(source_path.resolve())
+
+        with self._path_lock(key), source_path.open("rb") as handle:
+            state, reset = self._state_for(key, handle)
+            if state is None:
+                return self._delta([], None, reset=reset)
+            state.last_used = time.monotonic()
+
+            handle.seek(0)
+            _, _, declared_size = _read_pcm_header(handle) or (0, 0, 0)
+            end = os.fstat(handle.fileno()).st_size
+            if declared_size not in UNKNOWN_DATA_SIZES:
+                end = min(end, state.data_offset + declared_size)
+            available = max(0, end - state.data_offset - state.consumed_bytes)
+            available -= available % 2
+
+            new_chunks: list[dict] = []
+            handle.seek(state.data_offset + state.consumed_bytes)
+
+            with get_scheduler().recognition_slot(_resolve_model_path()):
+                while available > 0:
+                    data = handle.read(min(READ_CHUNK_BYTES, available))
+                    if not data:
+                        break
+                    available -= len(data)
+                    state.consumed_bytes += len(data)
+
+                    if state.recognizer.AcceptWaveform(data):
+                        new_chunks.append(json.loads(state.recognizer.Result()))
+
+                partial = json.loads(state.recognizer.PartialResult()).get("partial", "")
+
+            state.final_chunks.extend(new_chunks)
+            state.last_used = time.monotonic()
+            return self._delta(new_chunks, state, partial, reset)
+
+    def finalize(self, wav_path: Path) -> dict:
+        """Decode any remaining audio, flush the last utterance and forget the path."""
+        delta = self.update(wav_path)
+        key = str(Path(wav_path).resolve())
+
+        with self._path_lock(key):
+            with self._lock:
+                state = self._states.pop(key, None)
+                self._path_locks.pop(key, None)
+            if state is None:
+                return delta
+            last_chunk = json.loads(state.recognizer.FinalResult())
+
+        tail = self._delta([last_chunk], state)
+        delta["text"] = " ".join(part for part in (delta["text"], tail["text"]) if part)
+        delta["partial"] = ""
+        if self.save_words:
+            delta["result"] = delta["result"] + tail["result"]
+        return delta
+
+    def transcript(self, wav_path: Path) -> dict:
+        """Return everything finalized so far for ``wav_path``."""
+        with self._lock:
+            state = self._states.get(str(Path(wav_path).resolve()))
+            chunks = list(state.final_chunks) if state is not None else []
+        return self._delta(chunks, state)
+
+
+_default_transcribers: dict[bool, IncrementalTranscriber] = {}
+_default_lock = threading.Lock()
+
+
+def transcribe_incremental(wav_path: Path, save_words: bool = False) -> dict:
+    """Module-level convenience wrapper around a shared IncrementalTranscriber."""
+    return _default_transcriber(save_words).update(wav_path)
+
+
+def finalize_incremental(wav_path: Path, save_words: bool = False) -> dict:
+    """Flush the last utterance of a closed recording and release its recognizer."""
+    return _default_transcriber(save_words).finalize(wav_path)
+
+
+def _default_transcriber(save_words: bool) -> IncrementalTranscriber:
+    with _default_lock:
+        if save_words not in _default_transcribers:
+            _default_transcribers[save_words] = IncrementalTranscriber(save_words)
+        return _default_transcribers[save_words]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from vosk import KaldiRecognizer
+
+from core import _resolve_model_path, get_model, open_pcm_wav
+from scheduler import get_scheduler
+
+
+UNKNOWN_TOKEN = "[unk]"
+
+
+def _normalize_phrases(phrases: list[str]) -> list[str]:
+    normalized: list[str] = []
+    for phrase in phrases:
+        cleaned = " ".join(str(phrase).lower().split())
+        if cleaned and cleaned not in normalized:
+            normalized.append(cleaned)
+
+    if not normalized:
+        raise ValueError("At least one non-empty keyword phrase is required.")
+
+    return normalized
+
+
+def _match_phrases(words: list[dict], phrases: list[list[str]], min_confidence: float) -> list[dict]:
+    hits: list[dict] = []
+    tokens = [str(word.get("word", "")).lower() for word in words]
+
+    for index in range(len(tokens)):
+        for phrase_tokens in phrases:
+            end_index = index + len(phrase_tokens)
+            if tokens[index:end_index] != phrase_tokens:
+                continue
+
+            matched = words[index:end_index]
+            confidence = min(float(word.get("conf", 1.0)) for word in matched)
+            if confidence < min_confidence:
+                continue
+
+            hits.append(
+                {
+                    "phrase": " ".join(phrase_tokens),
+                    "start": matched[0].get("start"),
+                    "end": matched[-1].get("end"),
+                    "conf": confidence,
+                }
+            )
+
+    return hits
+
+
+def spot_keywords(
+    wav_path: Path,
+    phrases: list[str],
+    min_confidence: float = 0.5,
+    chunk_frames: int = 4000,
+) -> list[dict]:
+    """
+    Find where the given phrases are spoken using a grammar-restricted recognizer.
+
+    Decoding against a small grammar is far cheaper than full large-vocabulary
+    transcription; anything outside the grammar is absorbed by ``[unk]``.
+
+    Args:
+        wav_path: Mono 16-bit PCM WAV file
+        phrases: Words or phrases to look for (case-insensitive)
+        min_confidence: Drop hits whose weakest word scores below this
+        chunk_frames: Frames fed to the recognizer per call
+
+    Returns:
+        Hits ordered by time, each with ``phrase``, ``start``, ``end`` and ``conf``
+
+    Raises:
+        ValueError: If no usable phrase is given or the WAV format is unsupported
+        FileNotFoundError: If the WAV file does not exist
+    """
+    normalized = _normalize_phrases(phrases)
+    phrase_tokens = [phrase.split() for phrase in normalized]
+    grammar = json.dumps(normalized + [UNKNOWN_TOKEN])
+
+    hits: list[dict] = []
+
+    with open_pcm_wav(wav_path) as wav_file:
+        with get_scheduler().recognition_slot(_resolve_model_path()):
+            recognizer = KaldiRecognizer(get_model(), wav_file.getframerate(), grammar)
+            recognizer.SetWords(True)
+
+            while True:
+                data = wav_file.readframes(chunk_frames)
+                if len(data) == 0:
+                    break
+
+                if recognizer.AcceptWaveform(data):
+                    chunk = json.loads(recognizer.Result())
+                    hits.extend(_match_phrases(chunk.get("result", []), phrase_tokens, min_confidence))
+
+            chunk = json.loads(recognizer.FinalResult())
+            hits.extend(_match_phrases(chunk.get("result", []), phrase_tokens, min_confidence))
+
+    return hits
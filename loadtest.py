@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import math
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+from convert import convert_to_wav
+from core import get_model_sample_rate, transcribe_file
+from download import download_from_url
+from punctuation import punctuate_text
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Load-test clips use a typical recording format rather than the model's.
+# convert_to_wav only copies WAVs already in the model's format, so this
+# makes every job's convert stage really decode, downmix and resample.
+LOAD_SAMPLE_RATE = 44100
+LOAD_CHANNELS = 2
+
+
+def synthesize_wav(
+    path: Path,
+    seconds: float,
+    sample_rate: int = 16000,
+    seed: int = 0,
+    channels: int = 1,
+) -> Path:
+    """Write a 16-bit WAV of gated tones and noise that loosely mimics speech energy."""
+    rng = random.Random(seed)
+    frames = bytearray()
+    total = int(seconds * sample_rate)
+
+    for index in range(total):
+        t = index / sample_rate
+        # Syllable-rate gating so the recognizer sees bursts and pauses.
+        gate = 1.0 if math.sin(2 * math.pi * 3 * t) > -0.2 else 0.05
+        tone = math.sin(2 * math.pi * (180 + 60 * math.sin(2 * math.pi * 0.5 * t)) * t)
+        sample = gate * (0.5 * tone + 0.1 * rng.uniform(-1.0, 1.0))
+        frames += int(max(-1.0, min(1.0, sample)) * 12000).to_bytes(2, "little", signed=True) * channels
+
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(bytes(frames))
+
+    return path
+
+
+def synthesize_inputs(root: Path, durations: list[float]) -> list[Path]:
+    """Write one load-test clip per duration, in a format the convert stage must decode."""
+    return [
+        synthesize_wav(
+            root / f"clip_{index}.wav",
+            seconds,
+            sample_rate=LOAD_SAMPLE_RATE,
+            seed=index,
+            channels=LOAD_CHANNELS,
+        )
+        for index, seconds in enumerate(durations)
+    ]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *_args) -> None:
+        pass
+
+
+def serve_directory(root: Path) -> tuple[ThreadingHTTPServer, str]:
+    """Serve ``root`` over HTTP on an ephemeral localhost port, standing in for remote URLs."""
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_pipeline_job(url: str) -> dict:
+    """Download, convert, transcribe and punctuate one URL; return per-stage timings."""
+    timings: dict[str, float] = {}
+
+    started = time.perf_counter()
+    source_path = download_from_url(url)
+    timings["download"] = time.perf_counter() - started
+
+    try:
+        started = time.perf_counter()
+        wav_path = convert_to_wav(source_path, sample_rate=get_model_sample_rate())
+        timings["convert"] = time.perf_counter() - started
+
+        try:
+            with wave.open(str(wav_path), "rb") as wav_file:
+                audio_seconds = wav_file.getnframes() / wav_file.getframerate()
+
+            started = time.perf_counter()
+            transcription = transcribe_file(wav_path, save_words=True)
+            timings["transcribe"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            punctuate_text(transcription.get("text", ""), transcription.get("result"))
+            timings["punctuate"] = time.perf_counter() - started
+        finally:
+            shutil.rmtree(wav_path.parent, ignore_errors=True)
+    finally:
+        shutil.rmtree(source_path.parent, ignore_errors=True)
+
+    return {"audio_seconds": audio_seconds, "stages": timings}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Linear-interpolated percentile, ``fraction`` in [0, 1]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _rusage_peak_bytes(who: str) -> int:
+    if resource is None:
+        return 0
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(getattr(resource, who)).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler:
+    """Track this process's peak resident set size while a load level runs."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def _current_rss() -> int:
+        try:
+            with open("/proc/self/statm", encoding="ascii") as statm:
+                return int(statm.read().split()[1]) * resource.getpagesize()
+        except (AttributeError, OSError, IndexError, ValueError):
+            # Without /proc fall back to the lifetime peak.
+            return _rusage_peak_bytes("RUSAGE_SELF")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._current_rss())
+
+
+def run_level(
+    urls: list[str],
+    concurrency: int,
+    arrival_rate: float,
+    jobs: int,
+    job: Callable[[str], dict] = run_pipeline_job,
+    seed: int = 0,
+) -> dict:
+    """
+    Submit ``jobs`` requests with Poisson arrivals to ``concurrency`` workers.
+
+    Latency runs from a request's arrival to its completion, so it includes
+    time spent queued behind busy workers.
+    """
+    rng = random.Random(seed)
+    latencies: list[float] = []
+    real_time_factors: list[float] = []
+    audio_total = 0.0
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def timed(url: str, arrived: float) -> None:
+        nonlocal audio_total
+        try:
+            outcome = job(url)
+        except Exception as exc:
+            with lock:
+                errors.append(f"{type(exc).__name__}: {exc}")
+            return
+        finished = time.perf_counter()
+        processing = sum(outcome.get("stages", {}).values())
+        audio_seconds = float(outcome.get("audio_seconds", 0.0))
+        with lock:
+            latencies.append(finished - arrived)
+            audio_total += audio_seconds
+            if audio_seconds:
+                real_time_factors.append(processing / audio_seconds)
+
+    with _RssSampler() as sampler, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        level_started = time.perf_counter()
+        next_arrival = level_started
+        for index in range(jobs):
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(timed, urls[index % len(urls)], next_arrival)
+            if arrival_rate > 0:
+                next_arrival += rng.expovariate(arrival_rate)
+        executor.shutdown(wait=True)
+        wall = time.perf_counter() - level_started
+
+    completed = len(latencies)
+    children_peak = _rusage_peak_bytes("RUSAGE_CHILDREN")
+    return {
+        "concurrency": concurrency,
+        "arrival_rate": arrival_rate,
+        "jobs": jobs,
+        "completed": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_p99": percentile(latencies, 0.99),
+        "throughput_jobs_per_s": completed / wall if wall else 0.0,
+        "audio_seconds_per_s": audio_total / wall if wall else 0.0,
+        "real_time_factor_mean": (
+            sum(real_time_factors) / len(real_time_factors) if real_time_factors else 0.0
+        ),
+        "peak_rss_mb": sampler.peak_bytes / (1024 * 1024),
+        # Largest ffmpeg child so far; ffmpeg memory is not part of this process's RSS.
+        "peak_child_rss_mb": children_peak / (1024 * 1024),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Drive download -> convert -> transcribe -> punctuate under increasing concurrency."
+    )
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--rate", type=float, default=2.0, help="Arrivals per second (0 = all at once)")
+    parser.add_argument("--jobs", type=int, default=20, help="Requests per concurrency level")
+    parser.add_argument("--durations", default="5,30", help="Comma-separated synthetic clip lengths (s)")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="stt_loadtest_") as temp_dir:
+        root = Path(temp_dir)
+        clips = synthesize_inputs(root, [float(value) for value in args.durations.split(",")])
+
+        server, base_url = serve_directory(root)
+        try:
+            urls = [f"{base_url}/{path.name}" for path in clips]
+            report = []
+            for level in (int(value) for value in args.concurrency.split(",")):
+                result = run_level(urls, level, args.rate, args.jobs)
+                report.append(result)
+                print(
+                    f"concurrency={level:<3} p50={result['latency_p50']:.2f}s "
+                    f"p95={result['latency_p95']:.2f}s p99={result['latency_p99']:.2f}s "
+                    f"throughput={result['throughput_jobs_per_s']:.2f}/s "
+                    f"rtf={result['real_time_factor_mean']:.3f} "
+                    f"rss={result['peak_rss_mb']:.0f}MB errors={result['errors']}",
+                    flush=True,
+                )
+        finally:
+            server.shutdown()
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
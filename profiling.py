@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, TypeVar
+
+
+F = TypeVar("F", bound=Callable)
+
+# Only one cProfile profiler can be active per process on Python 3.12+,
+# so concurrent jobs skip CPU profiling rather than failing.
+_cpu_profiler_lock = threading.Lock()
+_job_counter = 0
+_job_counter_lock = threading.Lock()
+
+
+def _profile_modes() -> set[str]:
+    """Parse STT_PROFILE, e.g. "cpu", "memory" or "cpu,memory" (also "1"/"all")."""
+    value = os.getenv("STT_PROFILE", "").strip().lower()
+    if not value or value in {"0", "false", "off", "no"}:
+        return set()
+    if value in {"1", "true", "on", "yes", "all"}:
+        return {"cpu", "memory"}
+    return {mode.strip() for mode in value.split(",") if mode.strip()} & {"cpu", "memory"}
+
+
+def _report_dir(name: str) -> Path:
+    global _job_counter
+
+    with _job_counter_lock:
+        _job_counter += 1
+        sequence = _job_counter
+
+    root = Path(os.getenv("STT_PROFILE_DIR") or Path(tempfile.gettempdir()) / "simpletext2speech_profiles")
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    job_dir = root / f"{stamp}_{os.getpid()}_{sequence:04d}_{name}"
+    job_dir.mkdir(parents=True, exist_ok=True)
+    return job_dir
+
+
+def _write_cpu_report(profiler: cProfile.Profile, job_dir: Path) -> None:
+    profiler.dump_stats(str(job_dir / "cpu.prof"))
+
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats("cumulative").print_stats(40)
+    (job_dir / "cpu.txt").write_text(summary.getvalue(), encoding="utf-8")
+
+
+def _write_memory_report(snapshot: tracemalloc.Snapshot, peak: int, job_dir: Path) -> None:
+    lines = [f"peak traced memory: {peak / (1024 * 1024):.2f} MiB", ""]
+    for stat in snapshot.statistics("lineno")[:40]:
+        lines.append(str(stat))
+    (job_dir / "memory.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """
+    Profile calls to the decorated function when STT_PROFILE is set.
+
+    Reports go to a per-call directory under STT_PROFILE_DIR (default: a
+    folder in the system temp directory): ``cpu.prof``/``cpu.txt`` from
+    cProfile and ``memory.txt`` from a tracemalloc snapshot. When
+    STT_PROFILE is unset the wrapper only pays for one environment lookup.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            modes = _profile_modes()
+            if not modes:
+                return func(*args, **kwargs)
+
+            profiler: cProfile.Profile | None = None
+            if "cpu" in modes and _cpu_profiler_lock.acquire(blocking=False):
+                profiler = cProfile.Profile()
+
+            # Nested or concurrent calls share the tracer started by the outermost one.
+            owns_tracemalloc = "memory" in modes and not tracemalloc.is_tracing()
+            if owns_tracemalloc:
+                tracemalloc.start(10)
+
+            started = time.perf_counter()
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+            finally:
+                elapsed = time.perf_counter() - started
+                snapshot, peak = None, 0
+                if owns_tracemalloc:
+                    snapshot = tracemalloc.take_snapshot()
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                try:
+                    job_dir = _report_dir(name)
+                    (job_dir / "timing.txt").write_text(f"{name}: {elapsed:.6f} s\n", encoding="utf-8")
+                    if profiler is not None:
+                        _write_cpu_report(profiler, job_dir)
+                    if snapshot is not None:
+                        _write_memory_report(snapshot, peak, job_dir)
+                except OSError:
+                    # Profiling must never break the job it observes.
+                    pass
+                finally:
+                    if profiler is not None:
+                        _cpu_profiler_lock.release()
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Iterable
 
+from profiling import profiled
+
 
 def _sentence_case(token: str) -> str:
     if not token:
@@ -58,14 +60,15 @@ def _build_from_text(text: str, words_per_sentence: int = 20) -> str:
     return " ".join(sentences).strip()
 
 
-def punctuate_text(text: str, words: list[dict] | None = None) -> tuple[str, bool, str | None]:
+@profiled("punctuate_text")
+def punctuate_text(text: str, words: Iterable[dict] | None = None) -> tuple[str, bool, str | None]:
     cleaned = text.strip()
     if not cleaned:
         return "", False, None
 
-    if words:
-        punctuated = _build_from_words(words)
-    else:
+    # ``words`` may be a one-shot iterator (e.g. streamed from a result store).
+    punctuated = _build_from_words(words) if words is not None else ""
+    if not punctuated:
         punctuated = _build_from_text(cleaned)
 
     return punctuated or cleaned, True, None
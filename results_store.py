@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import textwrap
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+class JsonlResultStore:
+    """
+    Finalized recognizer chunks spilled to a JSONL file as they are produced.
+
+    Keeps long transcripts' word lists on disk instead of in memory; readers
+    stream them back with ``iter_chunks``/``iter_words``.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        if path is None:
+            path = Path(tempfile.mkdtemp(prefix="stt_results_")) / "chunks.jsonl"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("w", encoding="utf-8")
+
+    def append(self, chunk: dict) -> None:
+        self._handle.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if not self._handle.closed:
+            self._handle.close()
+
+    def __enter__(self) -> "JsonlResultStore":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def iter_chunks(self) -> Iterator[dict]:
+        if not self._handle.closed:
+            self._handle.flush()
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_words(self) -> Iterator[dict]:
+        for chunk in self.iter_chunks():
+            chunk_words = chunk.get("result")
+            if isinstance(chunk_words, list):
+                yield from chunk_words
+
+    def text(self) -> str:
+        return " ".join(
+            chunk.get("text", "").strip()
+            for chunk in self.iter_chunks()
+            if chunk.get("text", "").strip()
+        ).strip()
+
+
+def write_txt_export(text: str, target: Path) -> Path:
+    target = Path(target)
+    target.write_text(text, encoding="utf-8")
+    return target
+
+
+def write_json_export(text: str, words: Iterable[dict] | None, target: Path) -> Path:
+    """
+    Stream ``{"text": ..., "result": [...]}`` to ``target`` one word at a time.
+
+    The output is byte-for-byte what ``json.dumps(..., indent=2, ensure_ascii=False)``
+    produces for the same data, without building the document in memory.
+    """
+    target = Path(target)
+    with target.open("w", encoding="utf-8") as handle:
+        handle.write("{\n")
+        handle.write(f'  "text": {json.dumps(text, ensure_ascii=False)}')
+
+        if words is not None:
+            handle.write(',\n  "result": [')
+            first = True
+            for word in words:
+                handle.write("\n" if first else ",\n")
+                handle.write(textwrap.indent(json.dumps(word, indent=2, ensure_ascii=False), "    "))
+                first = False
+            handle.write("]" if first else "\n  ]")
+
+        handle.write("\n}")
+
+    return target
+
+
+def paginate_text(text: str, page_chars: int) -> list[str]:
+    """Split ``text`` into pages of at most ``page_chars`` characters, breaking at whitespace."""
+    if page_chars <= 0:
+        raise ValueError("page_chars must be positive.")
+
+    pages: list[str] = []
+    remaining = text.strip()
+    while len(remaining) > page_chars:
+        cut = remaining.rfind(" ", 0, page_chars + 1)
+        if cut <= 0:
+            cut = page_chars
+        pages.append(remaining[:cut].rstrip())
+        remaining = remaining[cut:].lstrip()
+    pages.append(remaining)
+    return pages
+
+
+def paginate_file(path: Path, page_chars: int) -> list[tuple[int, int]]:
+    """
+    Paginate a UTF-8 text file like ``paginate_text``, as byte ranges into the file.
+
+    Callers keep only the ranges and read one page at a time with ``read_page``,
+    so the transcript itself does not have to stay in memory.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    ranges: list[tuple[int, int]] = []
+    cursor = 0
+    byte_cursor = 0
+    for page in paginate_text(text, page_chars):
+        start = text.find(page, cursor)
+        byte_start = byte_cursor + len(text[cursor:start].encode("utf-8"))
+        byte_end = byte_start + len(page.encode("utf-8"))
+        ranges.append((byte_start, byte_end))
+        cursor, byte_cursor = start + len(page), byte_end
+    return ranges
+
+
+def read_page(path: Path, byte_range: tuple[int, int]) -> str:
+    start, end = byte_range
+    with Path(path).open("rb") as handle:
+        handle.seek(start)
+        return handle.read(end - start).decode("utf-8")
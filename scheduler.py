@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# Share of the memory limit recognizers may claim; the rest is left for
+# ffmpeg, Streamlit and the Python heap.
+RECOGNITION_MEMORY_SHARE = 0.8
+# Working memory of one KaldiRecognizer (decoder state, lattices, feature
+# buffers). The model itself is shared by every recognizer and charged once.
+RECOGNIZER_MEMORY_BYTES = 64 << 20
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    cpu_count: float
+    memory_limit_bytes: int | None
+
+
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpu_limit(cgroup_root: Path) -> float | None:
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read_text(cgroup_root / "cpu.max")
+    if cpu_max:
+        parts = cpu_max.split()
+        if len(parts) == 2 and parts[0] != "max":
+            try:
+                quota, period = int(parts[0]), int(parts[1])
+            except ValueError:
+                return None
+            if quota > 0 and period > 0:
+                return quota / period
+        return None
+
+    # cgroup v1: separate quota/period files, quota of -1 means unlimited
+    quota_text = _read_text(cgroup_root / "cpu" / "cpu.cfs_quota_us")
+    period_text = _read_text(cgroup_root / "cpu" / "cpu.cfs_period_us")
+    if quota_text and period_text:
+        try:
+            quota, period = int(quota_text), int(period_text)
+        except ValueError:
+            return None
+        if quota > 0 and period > 0:
+            return quota / period
+
+    return None
+
+
+def _cgroup_memory_limit(cgroup_root: Path) -> int | None:
+    for candidate in (
+        cgroup_root / "memory.max",
+        cgroup_root / "memory" / "memory.limit_in_bytes",
+    ):
+        value = _read_text(candidate)
+        if not value or value == "max":
+            continue
+        try:
+            limit = int(value)
+        except ValueError:
+            continue
+        # cgroup v1 reports "unlimited" as a huge page-aligned number
+        if 0 < limit < 1 << 60:
+            return limit
+
+    return None
+
+
+def _physical_memory() -> int | None:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def detect_resource_limits(cgroup_root: Path = CGROUP_ROOT) -> ResourceLimits:
+    if hasattr(os, "sched_getaffinity"):
+        cpu_count = float(len(os.sched_getaffinity(0)))
+    else:
+        cpu_count = float(os.cpu_count() or 1)
+
+    cgroup_cpus = _cgroup_cpu_limit(cgroup_root)
+    if cgroup_cpus is not None:
+        cpu_count = min(cpu_count, cgroup_cpus)
+
+    memory_limit = _cgroup_memory_limit(cgroup_root)
+    physical = _physical_memory()
+    if memory_limit is None or (physical is not None and physical < memory_limit):
+        memory_limit = physical
+
+    return ResourceLimits(cpu_count=max(cpu_count, 1.0), memory_limit_bytes=memory_limit)
+
+
+@lru_cache(maxsize=None)
+def model_footprint_bytes(model_path: str) -> int:
+    """Estimate resident memory of a Vosk model from its on-disk size."""
+    root = Path(model_path)
+    if not root.is_dir():
+        return 0
+    return sum(item.stat().st_size for item in root.rglob("*") if item.is_file())
+
+
+class PermitPool:
+    """Counting semaphore with an optional memory budget and wait metrics."""
+
+    def __init__(self, name: str, permits: int, memory_budget_bytes: int | None = None) -> None:
+        if permits < 1:
+            raise ValueError(f"{name} pool needs at least one permit.")
+        self.name = name
+        self.permits = permits
+        self.memory_budget_bytes = memory_budget_bytes
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._memory_in_use = 0
+        self._reserved: dict[str, int] = {}
+        self._waiting = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _memory_cost(self, memory_bytes: int) -> int:
+        if self.memory_budget_bytes is None:
+            return 0
+        # Never ask for more than the whole budget, or the caller would block forever.
+        return min(max(memory_bytes, 0), self.memory_budget_bytes)
+
+    def _has_room(self, memory_cost: int) -> bool:
+        if self._in_use >= self.permits:
+            return False
+        if self.memory_budget_bytes is None or self._in_use == 0:
+            return True
+        reserved = sum(self._reserved.values())
+        return reserved + self._memory_in_use + memory_cost <= self.memory_budget_bytes
+
+    def reserve(self, key: str, memory_bytes: int) -> None:
+        """
+        Set aside memory once per ``key`` for something all holders share.
+
+        Used for loaded models: they stay resident for the life of the
+        process however many recognizers use them, so they shrink the budget
+        once instead of being charged per permit.
+        """
+        with self._condition:
+            if key not in self._reserved:
+                self._reserved[key] = self._memory_cost(memory_bytes)
+
+    @contextmanager
+    def acquire(self, memory_bytes: int = 0) -> Iterator[None]:
+        memory_cost = self._memory_cost(memory_bytes)
+        started = time.perf_counter()
+
+        with self._condition:
+            self._waiting += 1
+            try:
+                self._condition.wait_for(lambda: self._has_room(memory_cost))
+            finally:
+                self._waiting -= 1
+            waited = time.perf_counter() - started
+            self._in_use += 1
+            self._memory_in_use += memory_cost
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= 1
+                self._memory_in_use -= memory_cost
+                self._condition.notify_all()
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "permits": self.permits,
+                "in_use": self._in_use,
+                "reserved_bytes": sum(self._reserved.values()),
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "total_wait_seconds": self._total_wait,
+                "max_wait_seconds": self._max_wait,
+                "mean_wait_seconds": self._total_wait / self._acquired if self._acquired else 0.0,
+            }
+
+
+class Scheduler:
+    """
+    Separate permit pools for ffmpeg decodes, Kaldi recognitions and live streams.
+
+    Batch recognitions can hold a recognition permit for hours, so live
+    streaming frames get a pool of their own: their recognizers already
+    exist for the whole connection and each frame needs the CPU only for a
+    few milliseconds, which must not wait behind a long file.
+    """
+
+    def __init__(
+        self,
+        limits: ResourceLimits | None = None,
+        decode_permits: int | None = None,
+        recognition_permits: int | None = None,
+        streaming_permits: int | None = None,
+        default_model_path: Path | None = None,
+        recognizer_memory_bytes: int = RECOGNIZER_MEMORY_BYTES,
+    ) -> None:
+        self.limits = limits or detect_resource_limits()
+        self.recognizer_memory_bytes = recognizer_memory_bytes
+        cores = max(1, int(self.limits.cpu_count))
+
+        recognition_budget = None
+        if self.limits.memory_limit_bytes is not None:
+            recognition_budget = int(self.limits.memory_limit_bytes * RECOGNITION_MEMORY_SHARE)
+
+        if recognition_permits is None:
+            recognition_permits = cores
+            if recognition_budget is not None and recognizer_memory_bytes > 0:
+                footprint = model_footprint_bytes(str(default_model_path)) if default_model_path else 0
+                room = max(0, recognition_budget - footprint)
+                recognition_permits = max(1, min(cores, room // recognizer_memory_bytes))
+
+        self.decode = PermitPool("decode", decode_permits or cores)
+        self.recognition = PermitPool("recognition", recognition_permits, recognition_budget)
+        self.streaming = PermitPool("streaming", streaming_permits or cores)
+
+    def decode_slot(self):
+        return self.decode.acquire()
+
+    def recognition_slot(self, model_path: Path | None = None):
+        if model_path:
+            key = str(Path(model_path).resolve())
+            self.recognition.reserve(key, model_footprint_bytes(str(model_path)))
+        return self.recognition.acquire(memory_bytes=self.recognizer_memory_bytes)
+
+    def streaming_slot(self):
+        return self.streaming.acquire()
+
+    def metrics(self) -> dict:
+        return {
+            "cpu_count": self.limits.cpu_count,
+            "memory_limit_bytes": self.limits.memory_limit_bytes,
+            "decode": self.decode.metrics(),
+            "recognition": self.recognition.metrics(),
+            "streaming": self.streaming.metrics(),
+        }
+
+
+_scheduler_instance: Scheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # A forked child inherits permit counts (and possibly held locks) from
+    # threads that do not exist in it; start it with a fresh scheduler.
+    global _scheduler_instance, _scheduler_lock
+    _scheduler_instance = None
+    _scheduler_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _env_int(name: str) -> int | None:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        parsed = int(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from exc
+    return parsed if parsed > 0 else None
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler_instance
+
+    if _scheduler_instance is None:
+        with _scheduler_lock:
+            if _scheduler_instance is None:
+                _scheduler_instance = Scheduler(
+                    decode_permits=_env_int("STT_DECODE_WORKERS"),
+                    recognition_permits=_env_int("STT_RECOGNITION_WORKERS"),
+                    streaming_permits=_env_int("STT_STREAMING_WORKERS"),
+                    default_model_path=Path(os.getenv("VOSK_MODEL_PATH", "model")),
+                )
+
+    return _scheduler_instance
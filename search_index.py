@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+TOKEN_PATTERN = re.compile(r"[\w']+")
+UNKNOWN_WORD = "[unk]"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    word_count INTEGER NOT NULL,
+    source_mtime_ns INTEGER,
+    source_size INTEGER
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    transcript_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    PRIMARY KEY (term_id, transcript_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_transcript ON postings (transcript_id);
+"""
+
+
+def normalize_tokens(text: str) -> list[str]:
+    return [token.strip("'") for token in TOKEN_PATTERN.findall(text.lower()) if token.strip("'")]
+
+
+def _indexable(words: Iterable[dict]) -> Iterator[tuple[str, int, int]]:
+    for word in words:
+        raw = str(word.get("word", ""))
+        start, end = word.get("start"), word.get("end")
+        if raw == UNKNOWN_WORD or not isinstance(start, (int, float)):
+            continue
+        if not isinstance(end, (int, float)):
+            end = start
+        for token in normalize_tokens(raw):
+            yield token, int(round(start * 1000)), int(round(end * 1000))
+
+
+class TranscriptIndex:
+    """
+    On-disk inverted index from words to (transcript, position, time) postings.
+
+    Postings are clustered by term, so a query touches only the rows for
+    its own words and never loads a transcript. Adding a transcript replaces
+    any earlier version of it in one transaction, so the index can be kept
+    current as new transcripts arrive.
+    """
+
+    def __init__(self, index_path: Path | None = None) -> None:
+        configured = os.getenv("STT_SEARCH_INDEX_PATH")
+        if index_path is not None:
+            self.path = Path(index_path)
+        elif configured:
+            self.path = Path(configured)
+        else:
+            self.path = Path(tempfile.gettempdir()) / "simpletext2speech_search.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "TranscriptIndex":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _term_ids(self, terms: Iterable[str]) -> dict[str, int]:
+        unique = sorted(set(terms))
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO terms (term) VALUES (?)", [(term,) for term in unique]
+        )
+        ids: dict[str, int] = {}
+        for offset in range(0, len(unique), 500):
+            batch = unique[offset : offset + 500]
+            placeholders = ",".join("?" * len(batch))
+            ids.update(
+                self._connection.execute(
+                    f"SELECT term, id FROM terms WHERE term IN ({placeholders})", batch
+                ).fetchall()
+            )
+        return ids
+
+    def add(
+        self,
+        name: str,
+        words: Iterable[dict],
+        source_mtime_ns: int | None = None,
+        source_size: int | None = None,
+    ) -> int:
+        """
+        Index (or re-index) one transcript's word list under ``name``.
+
+        Returns:
+            The number of indexed words
+        """
+        tokens = list(_indexable(words))
+
+        with self._lock, self._connection:
+            existing = self._connection.execute(
+                "SELECT id FROM transcripts WHERE name = ?", (name,)
+            ).fetchone()
+            if existing is not None:
+                self._connection.execute("DELETE FROM postings WHERE transcript_id = ?", existing)
+                self._connection.execute("DELETE FROM transcripts WHERE id = ?", existing)
+
+            transcript_id = self._connection.execute(
+                "INSERT INTO transcripts (name, word_count, source_mtime_ns, source_size) VALUES (?, ?, ?, ?)",
+                (name, len(tokens), source_mtime_ns, source_size),
+            ).lastrowid
+
+            term_ids = self._term_ids(token for token, _, _ in tokens)
+            self._connection.executemany(
+                "INSERT INTO postings (term_id, transcript_id, position, start_ms, end_ms) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (term_ids[token], transcript_id, position, start_ms, end_ms)
+                    for position, (token, start_ms, end_ms) in enumerate(tokens)
+                ),
+            )
+
+        return len(tokens)
+
+    def add_file(self, json_path: Path, name: str | None = None) -> bool:
+        """
+        Index a stored transcript JSON (``{"text": ..., "result": [...]}``).
+
+        Files whose size and modification time match the indexed copy are
+        skipped, so re-running over a directory only reads new or changed
+        transcripts. Files without word timings (text-only transcripts) and
+        unreadable JSON are recorded with no words, so they are skipped too.
+
+        Returns:
+            Whether the file's words were (re-)indexed
+        """
+        source = Path(json_path)
+        name = name or str(source.resolve())
+        stat = source.stat()
+
+        with self._lock:
+            indexed = self._connection.execute(
+                "SELECT source_mtime_ns, source_size FROM transcripts WHERE name = ?", (name,)
+            ).fetchone()
+        if indexed == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        try:
+            transcription = json.loads(source.read_text(encoding="utf-8"))
+        except ValueError:
+            transcription = None
+        words = transcription.get("result") if isinstance(transcription, dict) else None
+        if not isinstance(words, list):
+            self.add(name, [], source_mtime_ns=stat.st_mtime_ns, source_size=stat.st_size)
+            return False
+
+        self.add(name, words, source_mtime_ns=stat.st_mtime_ns, source_size=stat.st_size)
+        return True
+
+    def remove(self, name: str) -> bool:
+        with self._lock, self._connection:
+            existing = self._connection.execute(
+                "SELECT id FROM transcripts WHERE name = ?", (name,)
+            ).fetchone()
+            if existing is None:
+                return False
+            self._connection.execute("DELETE FROM postings WHERE transcript_id = ?", existing)
+            self._connection.execute("DELETE FROM transcripts WHERE id = ?", existing)
+        return True
+
+    def search(self, phrase: str, limit: int | None = None) -> list[dict]:
+        """
+        Find every occurrence of ``phrase`` as consecutive words.
+
+        Returns:
+            Matches ordered by transcript and time, each with ``transcript``,
+            ``start_ms`` (first word) and ``end_ms`` (last word)
+        """
+        tokens = normalize_tokens(phrase)
+        if not tokens:
+            return []
+
+        with self._lock:
+            placeholders = ",".join("?" * len(set(tokens)))
+            term_ids = dict(
+                self._connection.execute(
+                    f"SELECT term, id FROM terms WHERE term IN ({placeholders})", sorted(set(tokens))
+                ).fetchall()
+            )
+            if len(term_ids) < len(set(tokens)):
+                return []
+
+            # One self-join per following word, each an index lookup on
+            # (term_id, transcript_id, position).
+            joins = [
+                f"JOIN postings p{i} ON p{i}.term_id = ? AND p{i}.transcript_id = p0.transcript_id "
+                f"AND p{i}.position = p0.position + {i}"
+                for i in range(1, len(tokens))
+            ]
+            last = len(tokens) - 1
+            query = (
+                f"SELECT t.name, p0.start_ms, p{last}.end_ms FROM postings p0 "
+                f"{' '.join(joins)} JOIN transcripts t ON t.id = p0.transcript_id "
+                "WHERE p0.term_id = ? ORDER BY t.name, p0.start_ms"
+            )
+            parameters: list = [term_ids[token] for token in tokens[1:]] + [term_ids[tokens[0]]]
+            if limit is not None:
+                query += " LIMIT ?"
+                parameters.append(limit)
+
+            rows = self._connection.execute(query, parameters).fetchall()
+
+        return [{"transcript": name, "start_ms": start_ms, "end_ms": end_ms} for name, start_ms, end_ms in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            transcripts, words = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(word_count), 0) FROM transcripts"
+            ).fetchone()
+            (terms,) = self._connection.execute("SELECT COUNT(*) FROM terms").fetchone()
+        return {"transcripts": transcripts, "words": words, "terms": terms}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Index word-level transcripts and search them by phrase.")
+    parser.add_argument("--index", type=Path, default=None, help="Index file (default: STT_SEARCH_INDEX_PATH or temp dir)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_command = commands.add_parser("index", help="Index transcript JSON files or directories of them")
+    index_command.add_argument("paths", nargs="+", type=Path)
+
+    search_command = commands.add_parser("search", help="Find a phrase across indexed transcripts")
+    search_command.add_argument("phrase")
+    search_command.add_argument("--limit", type=int, default=None)
+
+    args = parser.parse_args()
+
+    with TranscriptIndex(args.index) as index:
+        if args.command == "index":
+            updated = 0
+            for path in args.paths:
+                files = sorted(path.rglob("*.json")) if path.is_dir() else [path]
+                updated += sum(index.add_file(item) for item in files)
+            print(json.dumps({"updated": updated, **index.stats()}))
+        else:
+            for match in index.search(args.phrase, limit=args.limit):
+                print(json.dumps(match, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import struct
+
+from vosk import KaldiRecognizer
+
+from core import get_model, get_model_sample_rate
+from scheduler import get_scheduler
+
+
+FRAME_HEADER = struct.Struct(">I")
+DEFAULT_PORT = 2700
+
+
+class StreamingServer:
+    """
+    Live recognition over raw TCP.
+
+    Clients send length-prefixed frames: a 4-byte big-endian byte count
+    followed by that many bytes of mono 16-bit PCM. A zero-length frame ends
+    the stream. The server answers with newline-delimited JSON messages:
+    ``{"type": "partial", "partial": ...}`` whenever the partial hypothesis
+    changes, ``{"type": "final", "text": ...}`` for each finalized utterance
+    and ``{"type": "error", "error": ...}`` before closing on failures.
+
+    Each connection gets its own KaldiRecognizer on the shared model. Frames
+    are queued per connection; when the queue is full the server stops
+    reading that socket, so a client sending faster than it can be decoded
+    is slowed down by TCP flow control instead of growing memory. Reads,
+    queueing and writes all give up after ``idle_timeout`` seconds, so a
+    client that stops reading its results is dropped as well.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        sample_rate: int | None = None,
+        save_words: bool = False,
+        idle_timeout: float = 30.0,
+        max_queued_frames: int = 32,
+        max_frame_bytes: int = 1 << 20,
+    ) -> None:
+        self.host = host
+        self.port = port
+        # Clients are expected to send audio at the model's own rate unless told otherwise.
+        self.sample_rate = sample_rate or get_model_sample_rate()
+        self.save_words = save_words
+        self.idle_timeout = idle_timeout
+        self.max_queued_frames = max_queued_frames
+        self.max_frame_bytes = max_frame_bytes
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        # Load the model before accepting clients so the first one is not delayed.
+        await asyncio.get_running_loop().run_in_executor(None, get_model)
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _send(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        await asyncio.wait_for(writer.drain(), self.idle_timeout)
+
+    async def _read_frames(self, reader: asyncio.StreamReader, queue: asyncio.Queue) -> None:
+        while True:
+            header = await asyncio.wait_for(
+                reader.readexactly(FRAME_HEADER.size), self.idle_timeout
+            )
+            (length,) = FRAME_HEADER.unpack(header)
+            if length == 0:
+                await queue.put(None)
+                return
+            if length > self.max_frame_bytes:
+                raise ValueError(f"Frame of {length} bytes exceeds limit of {self.max_frame_bytes}.")
+            if length % 2:
+                raise ValueError("Frame length must be a whole number of 16-bit samples.")
+
+            frame = await asyncio.wait_for(reader.readexactly(length), self.idle_timeout)
+            await asyncio.wait_for(queue.put(frame), self.idle_timeout)
+
+    def _new_recognizer(self) -> KaldiRecognizer:
+        recognizer = KaldiRecognizer(get_model(), self.sample_rate)
+        recognizer.SetWords(self.save_words)
+        return recognizer
+
+    def _accept(self, recognizer: KaldiRecognizer, frame: bytes) -> dict:
+        with get_scheduler().streaming_slot():
+            if recognizer.AcceptWaveform(frame):
+                return {"type": "final", **json.loads(recognizer.Result())}
+            return {"type": "partial", **json.loads(recognizer.PartialResult())}
+
+    def _finish(self, recognizer: KaldiRecognizer) -> dict:
+        with get_scheduler().streaming_slot():
+            return {"type": "final", **json.loads(recognizer.FinalResult())}
+
+    async def _decode_frames(
+        self,
+        queue: asyncio.Queue,
+        recognizer: KaldiRecognizer,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        last_partial = ""
+
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                message = await loop.run_in_executor(None, self._finish, recognizer)
+                await self._send(writer, message)
+                return
+
+            message = await loop.run_in_executor(None, self._accept, recognizer, frame)
+            if message["type"] == "partial":
+                if message.get("partial", "") == last_partial:
+                    continue
+                last_partial = message.get("partial", "")
+            else:
+                last_partial = ""
+            await self._send(writer, message)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Building a recognizer takes long enough to stall every other client.
+        recognizer = await asyncio.get_running_loop().run_in_executor(None, self._new_recognizer)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued_frames)
+
+        reading = asyncio.create_task(self._read_frames(reader, queue))
+        decoding = asyncio.create_task(self._decode_frames(queue, recognizer, writer))
+
+        error = None
+        try:
+            try:
+                await asyncio.gather(reading, decoding)
+            except asyncio.TimeoutError:
+                error = "Connection idle timeout."
+            except (asyncio.IncompleteReadError, ConnectionError):
+                # Client went away; nothing left to report.
+                pass
+            except ValueError as exc:
+                error = str(exc)
+
+            # Stop both sides first so the report is the only pending write.
+            await self._stop(reading, decoding)
+            if error is not None:
+                await self._report(writer, error)
+        finally:
+            await self._stop(reading, decoding)
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                writer.transport.abort()
+            except ConnectionError:
+                pass
+
+    async def _stop(self, *tasks: asyncio.Task) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _report(self, writer: asyncio.StreamWriter, error: str) -> None:
+        try:
+            await self._send(writer, {"type": "error", "error": error})
+        except ConnectionError:
+            pass
+        except asyncio.TimeoutError:
+            # The client is not reading; drop the unsent output and the connection.
+            writer.transport.abort()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve live Vosk recognition over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sample-rate", type=int, default=None, help="Defaults to the model's sample rate")
+    parser.add_argument("--words", action="store_true", help="Include word timestamps in final results")
+    parser.add_argument("--idle-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    server = StreamingServer(
+        host=args.host,
+        port=args.port,
+        sample_rate=args.sample_rate,
+        save_words=args.words,
+        idle_timeout=args.idle_timeout,
+    )
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
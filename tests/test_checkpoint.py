@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from checkpoint import CheckpointWriter, checkpoint_lock, load_checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_round_trip_returns_committed_chunks_and_frame(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_checkpoint_") as temp_dir:
+            source = "fingerprint-a"
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+
+            writer = CheckpointWriter(checkpoint_path, source, save_words=False)
+            writer.commit([{"text": "one"}], 16000)
+            writer.commit([{"text": "two"}], 32000)
+            writer.close()
+
+            chunks, frame = load_checkpoint(checkpoint_path, source, save_words=False)
+
+        self.assertEqual(chunks, [{"text": "one"}, {"text": "two"}])
+        self.assertEqual(frame, 32000)
+
+    def test_uncommitted_and_torn_entries_are_dropped(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_checkpoint_") as temp_dir:
+            source = "fingerprint-a"
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+
+            writer = CheckpointWriter(checkpoint_path, source, save_words=True)
+            writer.commit([{"text": "one"}], 16000)
+            writer.close()
+            with checkpoint_path.open("a", encoding="utf-8") as handle:
+                handle.write('{"chunk": {"text": "two"}}\n{"frame": 3')
+
+            chunks, frame = load_checkpoint(checkpoint_path, source, save_words=True)
+
+            # Resuming rewrites the log without the torn tail.
+            CheckpointWriter(checkpoint_path, source, True, chunks, frame).close()
+            self.assertNotIn("two", checkpoint_path.read_text(encoding="utf-8"))
+
+        self.assertEqual(chunks, [{"text": "one"}])
+        self.assertEqual(frame, 16000)
+
+    def test_checkpoint_for_other_audio_is_ignored(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_checkpoint_") as temp_dir:
+            source = "fingerprint-a"
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+
+            writer = CheckpointWriter(checkpoint_path, source, save_words=False)
+            writer.commit([{"text": "one"}], 16000)
+            writer.close()
+
+            self.assertEqual(load_checkpoint(checkpoint_path, "fingerprint-b", save_words=False), ([], 0))
+
+    def test_missing_checkpoint_starts_from_zero(self) -> None:
+        self.assertEqual(load_checkpoint(Path("missing.checkpoint"), "fingerprint-a", False), ([], 0))
+
+    def test_lock_is_exclusive_while_held(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_checkpoint_") as temp_dir:
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+
+            with checkpoint_lock(checkpoint_path) as first:
+                with checkpoint_lock(checkpoint_path) as second:
+                    self.assertTrue(first)
+                    self.assertFalse(second)
+            with checkpoint_lock(checkpoint_path) as third:
+                self.assertTrue(third)
+
+
+if __name__ == "__main__":
+    unittest.main()
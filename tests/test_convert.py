@@ -1,14 +1,39 @@
 from __future__ import annotations
 
+import os
 import tempfile
 import unittest
+import wave
 from pathlib import Path
 from unittest.mock import Mock, patch
 
-from convert import convert_to_wav
+import convert
+from convert import AudioDecoder, FfmpegDecoder, InProcessDecoder, convert_to_wav, get_decoder, probe_streams
+
+
+VIDEO_WITH_AAC = [
+    {"index": 0, "codec_type": "video", "codec_name": "h264"},
+    {"index": 1, "codec_type": "audio", "codec_name": "aac", "sample_rate": "48000", "channels": 2},
+]
+
+
+def create_pcm_wav(path: Path, channels: int, framerate: int, frames: int) -> None:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(framerate)
+        wav_file.writeframes(b"\x10\x00" * channels * frames)
 
 
 class TestConvertToWav(unittest.TestCase):
+    def setUp(self) -> None:
+        # These tests exercise the ffmpeg subprocess backend explicitly.
+        self._env = patch.dict(os.environ, {"STT_DECODER": "ffmpeg"})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        self._env.stop()
+
     def test_missing_input_file_raises(self) -> None:
         missing = Path("does_not_exist.mp3")
 
@@ -55,6 +80,23 @@ class TestConvertToWav(unittest.TestCase):
         self.assertTrue(output_path.exists())
         self.assertEqual(output_path.suffix.lower(), ".wav")
 
+    def test_model_sample_rate_is_passed_to_ffmpeg(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "call.mp3"
+            source_path.write_bytes(b"audio")
+            commands = []
+
+            def fake_run(command, capture_output, text, check):
+                commands.append(command)
+                Path(command[-1]).write_bytes(b"RIFF")
+                return Mock(returncode=0, stderr="")
+
+            with patch("convert.subprocess.run", side_effect=fake_run):
+                output_path = convert_to_wav(source_path, sample_rate=8000)
+
+        self.assertEqual(commands[0][commands[0].index("-ar") + 1], "8000")
+        self.assertEqual(output_path.name, "call_8k_mono.wav")
+
     def test_mp4_video_file_converts_successfully(self) -> None:
         """Test that MP4 video files can be converted (audio extraction)."""
         with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
@@ -69,7 +111,9 @@ class TestConvertToWav(unittest.TestCase):
                 output_path.write_bytes(b"RIFF")
                 return Mock(returncode=0, stderr="")
 
-            with patch("convert.subprocess.run", side_effect=fake_run):
+            with patch("convert.probe_streams", return_value=VIDEO_WITH_AAC), patch(
+                "convert.subprocess.run", side_effect=fake_run
+            ):
                 output_path = convert_to_wav(source_path)
 
         self.assertTrue(output_path.exists())
@@ -89,12 +133,256 @@ class TestConvertToWav(unittest.TestCase):
                 output_path.write_bytes(b"RIFF")
                 return Mock(returncode=0, stderr="")
 
-            with patch("convert.subprocess.run", side_effect=fake_run):
+            with patch("convert.probe_streams", return_value=VIDEO_WITH_AAC), patch(
+                "convert.subprocess.run", side_effect=fake_run
+            ):
                 output_path = convert_to_wav(source_path)
 
         self.assertTrue(output_path.exists())
         self.assertEqual(output_path.suffix.lower(), ".wav")
 
+    def test_video_container_extracts_only_first_audio_stream(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "clip.mp4"
+            source_path.write_bytes(b"video")
+            commands = []
+
+            def fake_run(command, capture_output, text, check):
+                commands.append(command)
+                Path(command[-1]).write_bytes(b"RIFF")
+                return Mock(returncode=0, stderr="")
+
+            with patch("convert.probe_streams", return_value=VIDEO_WITH_AAC), patch(
+                "convert.subprocess.run", side_effect=fake_run
+            ):
+                convert_to_wav(source_path)
+
+        command = commands[0]
+        self.assertEqual(command[command.index("-map") + 1], "0:a:0")
+        self.assertIn("-vn", command)
+        self.assertEqual(command[command.index("-ar") + 1], "16000")
+
+    def test_video_pcm_audio_is_stream_copied(self) -> None:
+        streams = [
+            {"index": 0, "codec_type": "video", "codec_name": "prores"},
+            {"index": 1, "codec_type": "audio", "codec_name": "pcm_s16le", "sample_rate": "16000", "channels": 1},
+        ]
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "clip.mov"
+            source_path.write_bytes(b"video")
+            commands = []
+
+            def fake_run(command, capture_output, text, check):
+                commands.append(command)
+                Path(command[-1]).write_bytes(b"RIFF")
+                return Mock(returncode=0, stderr="")
+
+            with patch("convert.probe_streams", return_value=streams), patch(
+                "convert.subprocess.run", side_effect=fake_run
+            ):
+                convert_to_wav(source_path)
+
+        self.assertEqual(commands[0][commands[0].index("-c:a") + 1], "copy")
+        self.assertNotIn("-ar", commands[0])
+
+    def test_video_without_audio_fails_before_running_ffmpeg(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "silent.mp4"
+            source_path.write_bytes(b"video")
+
+            with patch(
+                "convert.probe_streams",
+                return_value=[{"index": 0, "codec_type": "video", "codec_name": "h264"}],
+            ), patch("convert.subprocess.run") as run:
+                with self.assertRaises(RuntimeError) as context:
+                    convert_to_wav(source_path)
+
+        run.assert_not_called()
+        self.assertIn("no audio stream", str(context.exception))
+
+    def test_unprobeable_video_falls_back_to_plain_conversion(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "clip.mp4"
+            source_path.write_bytes(b"video")
+            commands = []
+
+            def fake_run(command, capture_output, text, check):
+                commands.append(command)
+                Path(command[-1]).write_bytes(b"RIFF")
+                return Mock(returncode=0, stderr="")
+
+            with patch("convert.probe_streams", return_value=None), patch(
+                "convert.subprocess.run", side_effect=fake_run
+            ):
+                convert_to_wav(source_path)
+
+        self.assertNotIn("-map", commands[0])
+
+    def test_time_range_uses_input_seeking(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "talk.mp3"
+            source_path.write_bytes(b"audio")
+            commands = []
+
+            def fake_run(command, capture_output, text, check):
+                commands.append(command)
+                Path(command[-1]).write_bytes(b"RIFF")
+                return Mock(returncode=0, stderr="")
+
+            with patch("convert.subprocess.run", side_effect=fake_run):
+                convert_to_wav(source_path, start=2520.0, end=2820.0)
+
+        command = commands[0]
+        self.assertLess(command.index("-ss"), command.index("-i"))
+        self.assertEqual(command[command.index("-ss") + 1], "2520.000")
+        self.assertGreater(command.index("-t"), command.index("-i"))
+        self.assertEqual(command[command.index("-t") + 1], "300.000")
+
+    def test_invalid_time_range_raises(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "talk.mp3"
+            source_path.write_bytes(b"audio")
+
+            with self.assertRaises(ValueError):
+                convert_to_wav(source_path, start=10.0, end=5.0)
+            with self.assertRaises(ValueError):
+                convert_to_wav(source_path, start=-1.0)
+
+
+class TestProbeStreams(unittest.TestCase):
+    def test_parses_ffprobe_json(self) -> None:
+        output = '{"streams": [{"index": 0, "codec_type": "audio", "codec_name": "aac"}]}'
+        with patch("convert.subprocess.run", return_value=Mock(returncode=0, stdout=output)):
+            streams = probe_streams(Path("clip.mp4"))
+
+        self.assertEqual(streams, [{"index": 0, "codec_type": "audio", "codec_name": "aac"}])
+
+    def test_missing_ffprobe_returns_none(self) -> None:
+        with patch("convert.subprocess.run", side_effect=FileNotFoundError):
+            self.assertIsNone(probe_streams(Path("clip.mp4")))
+
+    def test_failed_probe_returns_none(self) -> None:
+        with patch("convert.subprocess.run", return_value=Mock(returncode=1, stdout="")):
+            self.assertIsNone(probe_streams(Path("clip.mp4")))
+
+
+class TestDecoderSelection(unittest.TestCase):
+    def test_explicit_ffmpeg_choice(self) -> None:
+        self.assertIsInstance(get_decoder("ffmpeg"), FfmpegDecoder)
+
+    def test_env_selects_in_process_backend(self) -> None:
+        with patch.dict(os.environ, {"STT_DECODER": "inprocess"}):
+            self.assertIsInstance(get_decoder(), InProcessDecoder)
+
+    def test_auto_falls_back_to_ffmpeg_without_pyav(self) -> None:
+        with patch("convert.av", None):
+            self.assertIsInstance(get_decoder("auto"), FfmpegDecoder)
+
+    def test_unknown_decoder_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            get_decoder("gstreamer")
+
+    def test_in_process_without_pyav_raises(self) -> None:
+        with patch("convert.av", None):
+            with self.assertRaises(RuntimeError) as context:
+                InProcessDecoder().decode(Path("in.mp3"), Path("out.wav"))
+
+        self.assertIn("PyAV", str(context.exception))
+
+    def test_decoder_base_class_is_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            AudioDecoder()
+
+
+class TestNormalizedWavPassthrough(unittest.TestCase):
+    def test_normalized_wav_is_copied_without_decoding(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "voice.wav"
+            create_pcm_wav(source_path, channels=1, framerate=16000, frames=1600)
+
+            with patch("convert.subprocess.run") as run, patch("convert.get_decoder") as pick:
+                output_path = convert_to_wav(source_path)
+
+            self.assertEqual(output_path.read_bytes(), source_path.read_bytes())
+
+        run.assert_not_called()
+        pick.assert_not_called()
+
+    def test_wav_at_model_rate_is_copied_and_other_rates_are_converted(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "call.wav"
+            create_pcm_wav(source_path, channels=1, framerate=8000, frames=800)
+
+            with patch("convert.get_decoder") as pick:
+                convert_to_wav(source_path, sample_rate=8000)
+            pick.assert_not_called()
+
+            with patch("convert.get_decoder") as pick:
+                convert_to_wav(source_path, sample_rate=16000)
+            pick.assert_called_once()
+
+    def test_normalized_wav_range_is_sliced_by_frame(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "voice.wav"
+            with wave.open(str(source_path), "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(16000)
+                wav_file.writeframes(b"".join(index.to_bytes(2, "little") for index in range(32000)))
+
+            output_path = convert_to_wav(source_path, start=0.5, end=1.0)
+
+            with wave.open(str(output_path), "rb") as wav_file:
+                self.assertEqual(wav_file.getnframes(), 8000)
+                first = int.from_bytes(wav_file.readframes(1), "little")
+
+        self.assertEqual(first, 8000)
+
+
+@unittest.skipUnless(convert.av is not None, "PyAV not installed")
+class TestInProcessDecoder(unittest.TestCase):
+    def test_stereo_44k_wav_is_downmixed_and_resampled(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "stereo.wav"
+            create_pcm_wav(source_path, channels=2, framerate=44100, frames=44100)
+
+            output_path = convert_to_wav(source_path, decoder="inprocess")
+
+            with wave.open(str(output_path), "rb") as wav_file:
+                self.assertEqual(wav_file.getnchannels(), 1)
+                self.assertEqual(wav_file.getsampwidth(), 2)
+                self.assertEqual(wav_file.getframerate(), 16000)
+                self.assertAlmostEqual(wav_file.getnframes(), 16000, delta=100)
+
+    def test_resamples_to_requested_rate(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "stereo.wav"
+            create_pcm_wav(source_path, channels=2, framerate=44100, frames=44100)
+
+            output_path = convert_to_wav(source_path, decoder="inprocess", sample_rate=8000, start=0.25, end=0.75)
+
+            with wave.open(str(output_path), "rb") as wav_file:
+                self.assertEqual(wav_file.getframerate(), 8000)
+                self.assertAlmostEqual(wav_file.getnframes(), 4000, delta=20)
+
+    def test_time_range_is_trimmed_to_the_sample(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "stereo.wav"
+            create_pcm_wav(source_path, channels=2, framerate=44100, frames=44100 * 3)
+
+            output_path = convert_to_wav(source_path, decoder="inprocess", start=1.0, end=1.5)
+
+            with wave.open(str(output_path), "rb") as wav_file:
+                self.assertAlmostEqual(wav_file.getnframes(), 8000, delta=20)
+
+    def test_undecodable_input_raises_runtime_error(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_convert_src_") as src_dir:
+            source_path = Path(src_dir) / "broken.mp3"
+            source_path.write_bytes(b"not audio at all")
+
+            with self.assertRaises(RuntimeError):
+                convert_to_wav(source_path, decoder="inprocess")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import tempfile
 import unittest
 import wave
@@ -7,7 +8,8 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 
 import core
-from core import get_model, transcribe_file
+from core import get_model, get_model_sample_rate, read_model_sample_rate, transcribe_file
+from results_store import JsonlResultStore
 
 
 class FakeRecognizer:
@@ -33,6 +35,53 @@ class FakeRecognizer:
         return '{"text":"world"}'
 
 
+class CrashingRecognizer:
+    fail_on_call: int | None = None
+    calls_per_instance: list[int] = []
+
+    def __init__(self, _model, _rate):
+        self._calls = 0
+        CrashingRecognizer.calls_per_instance.append(0)
+
+    def SetWords(self, _save_words):
+        pass
+
+    def AcceptWaveform(self, _data):
+        self._calls += 1
+        CrashingRecognizer.calls_per_instance[-1] = self._calls
+        if self._calls == CrashingRecognizer.fail_on_call:
+            raise MemoryError("simulated OOM")
+        return True
+
+    def Result(self):
+        # Each 4000-frame chunk is 0.25 s; times are relative to this recognizer's start.
+        start = (self._calls - 1) * 0.25
+        return json.dumps(
+            {"text": f"c{self._calls}", "result": [{"word": f"c{self._calls}", "start": start, "end": start + 0.2}]}
+        )
+
+    def FinalResult(self):
+        return '{"text": ""}'
+
+
+class CountingRecognizer:
+    instances: list["CountingRecognizer"] = []
+
+    def __init__(self, _model, _rate):
+        self.frames = 0
+        CountingRecognizer.instances.append(self)
+
+    def SetWords(self, _save_words):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.frames += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        return '{"text":"window","result":[{"word":"window","start":0.5,"end":0.9}]}'
+
+
 def create_mono_pcm_wav(path: Path, frames: int = 8000) -> None:
     with wave.open(str(path), "wb") as wav_file:
         wav_file.setnchannels(1)
@@ -47,6 +96,8 @@ class TestCore(unittest.TestCase):
 
     def tearDown(self) -> None:
         core._model_instance = None
+        core._models_by_path.clear()
+        core._sample_rates.clear()
 
     def test_get_model_singleton_loads_once(self) -> None:
         with tempfile.TemporaryDirectory(prefix="test_model_dir_") as model_dir:
@@ -62,6 +113,36 @@ class TestCore(unittest.TestCase):
         self.assertIs(first, second)
         model_ctor.assert_called_once_with(str(model_path))
 
+    def test_get_model_with_path_caches_per_directory(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_model_dir_") as model_dir:
+            model_path = Path(model_dir)
+
+            with patch("core.Model", side_effect=lambda _path: object()) as model_ctor:
+                first = get_model(model_path)
+                second = get_model(model_path)
+
+        self.assertIs(first, second)
+        model_ctor.assert_called_once_with(str(model_path))
+
+    def test_get_model_with_missing_path_raises(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            get_model(Path("missing_model_dir"))
+
+    def test_model_sample_rate_is_read_from_feature_config(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_core_model_") as model_dir:
+            conf_dir = Path(model_dir) / "conf"
+            conf_dir.mkdir()
+            (conf_dir / "mfcc.conf").write_text(
+                "--use-energy=false   # only non-default option\n--sample-frequency=8000\n--num-mel-bins=40\n"
+            )
+
+            self.assertEqual(read_model_sample_rate(Path(model_dir)), 8000)
+            self.assertEqual(get_model_sample_rate(Path(model_dir)), 8000)
+
+    def test_model_sample_rate_defaults_to_16k(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_core_model_") as model_dir:
+            self.assertEqual(read_model_sample_rate(Path(model_dir)), 16000)
+
     def test_transcribe_file_missing_raises(self) -> None:
         with self.assertRaises(FileNotFoundError):
             transcribe_file(Path("missing.wav"))
@@ -95,6 +176,149 @@ class TestCore(unittest.TestCase):
         self.assertEqual(result["result"][0]["word"], "hello")
         self.assertEqual(result["result"][1]["word"], "world")
 
+    def test_transcribe_file_resumes_from_checkpoint_after_crash(self) -> None:
+        CrashingRecognizer.calls_per_instance = []
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+            create_mono_pcm_wav(wav_path, frames=32000)
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=CrashingRecognizer
+            ):
+                CrashingRecognizer.fail_on_call = 5
+                with self.assertRaises(MemoryError):
+                    transcribe_file(
+                        wav_path,
+                        save_words=True,
+                        checkpoint_path=checkpoint_path,
+                        checkpoint_interval=0,
+                    )
+                self.assertTrue(checkpoint_path.exists())
+
+                CrashingRecognizer.fail_on_call = None
+                result = transcribe_file(
+                    wav_path,
+                    save_words=True,
+                    checkpoint_path=checkpoint_path,
+                    checkpoint_interval=0,
+                )
+
+            self.assertFalse(checkpoint_path.exists())
+
+        # The resumed run only decodes the four chunks after the last checkpoint.
+        self.assertEqual(CrashingRecognizer.calls_per_instance, [5, 4])
+        self.assertEqual(result["text"], "c1 c2 c3 c4 c1 c2 c3 c4")
+        starts = [word["start"] for word in result["result"]]
+        self.assertEqual(starts, [0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75])
+
+    def test_checkpoint_resumes_for_reconverted_copy_of_the_audio(self) -> None:
+        CrashingRecognizer.calls_per_instance = []
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            first_wav = Path(temp_dir) / "first" / "audio.wav"
+            retry_wav = Path(temp_dir) / "retry" / "audio.wav"
+            first_wav.parent.mkdir()
+            retry_wav.parent.mkdir()
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+            create_mono_pcm_wav(first_wav, frames=32000)
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=CrashingRecognizer
+            ):
+                CrashingRecognizer.fail_on_call = 5
+                with self.assertRaises(MemoryError):
+                    transcribe_file(first_wav, checkpoint_path=checkpoint_path, checkpoint_interval=0)
+
+                # A retry converts the input again: new directory, new mtime, same samples.
+                create_mono_pcm_wav(retry_wav, frames=32000)
+                CrashingRecognizer.fail_on_call = None
+                result = transcribe_file(retry_wav, checkpoint_path=checkpoint_path, checkpoint_interval=0)
+
+        self.assertEqual(CrashingRecognizer.calls_per_instance, [5, 4])
+        self.assertEqual(result["text"], "c1 c2 c3 c4 c1 c2 c3 c4")
+
+    def test_precomputed_fingerprint_is_not_recomputed(self) -> None:
+        CrashingRecognizer.calls_per_instance = []
+        CrashingRecognizer.fail_on_call = None
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path, frames=8000)
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=CrashingRecognizer
+            ), patch("core.pcm_fingerprint") as fingerprint:
+                result = transcribe_file(
+                    wav_path,
+                    checkpoint_path=Path(temp_dir) / "audio.checkpoint",
+                    fingerprint="known",
+                )
+
+        fingerprint.assert_not_called()
+        self.assertEqual(result["text"], "c1 c2")
+
+    def test_checkpoint_for_other_file_is_ignored(self) -> None:
+        CrashingRecognizer.calls_per_instance = []
+        CrashingRecognizer.fail_on_call = None
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            checkpoint_path = Path(temp_dir) / "audio.checkpoint"
+            create_mono_pcm_wav(wav_path, frames=8000)
+            checkpoint_path.write_text('{"source": "elsewhere.wav"}\n{"frame": 4000}\n')
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=CrashingRecognizer
+            ):
+                result = transcribe_file(wav_path, checkpoint_path=checkpoint_path)
+
+        self.assertEqual(CrashingRecognizer.calls_per_instance, [2])
+        self.assertEqual(result["text"], "c1 c2")
+
+    def test_transcribe_file_time_range_seeks_and_offsets_words(self) -> None:
+        CountingRecognizer.instances = []
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path, frames=16000 * 10)
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=CountingRecognizer
+            ):
+                result = transcribe_file(wav_path, save_words=True, start=4.0, end=6.5)
+
+        self.assertEqual(CountingRecognizer.instances[0].frames, 16000 * 2.5)
+        self.assertEqual(result["result"][0]["start"], 4.5)
+        self.assertEqual(result["result"][0]["end"], 4.9)
+
+    def test_transcribe_file_time_offset_applies_to_excerpts(self) -> None:
+        CountingRecognizer.instances = []
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            wav_path = Path(temp_dir) / "excerpt.wav"
+            create_mono_pcm_wav(wav_path, frames=16000)
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=CountingRecognizer
+            ):
+                result = transcribe_file(wav_path, save_words=True, time_offset=2520.0)
+
+        self.assertEqual(result["result"][0]["start"], 2520.5)
+
+    def test_transcribe_file_spills_words_to_result_store(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_core_wav_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path)
+
+            with patch("core.get_model", return_value=object()), patch(
+                "core.KaldiRecognizer", side_effect=FakeRecognizer
+            ), JsonlResultStore(Path(temp_dir) / "chunks.jsonl") as store:
+                result = transcribe_file(wav_path, save_words=True, result_store=store)
+                words = [word["word"] for word in store.iter_words()]
+
+        self.assertEqual(result, {"text": "hello world"})
+        self.assertEqual(words, ["hello", "world"])
+
+    def test_transcribe_file_invalid_range_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            transcribe_file(Path("missing.wav"), start=5.0, end=2.0)
+
 
 if __name__ == "__main__":
     unittest.main()
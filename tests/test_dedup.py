@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+from dedup import TranscriptCache, pcm_fingerprint, transcribe_deduplicated
+from results_store import JsonlResultStore
+
+
+def create_mono_pcm_wav(path: Path, payload: bytes, framerate: int = 16000) -> None:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(framerate)
+        wav_file.writeframes(payload)
+
+
+class TestPcmFingerprint(unittest.TestCase):
+    def test_same_samples_match_regardless_of_file_name(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            first = Path(temp_dir) / "from_m4a.wav"
+            second = Path(temp_dir) / "from_mp4.wav"
+            create_mono_pcm_wav(first, b"\x01\x02" * 4000)
+            create_mono_pcm_wav(second, b"\x01\x02" * 4000)
+
+            self.assertEqual(pcm_fingerprint(first), pcm_fingerprint(second))
+
+    def test_different_samples_differ(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            first = Path(temp_dir) / "a.wav"
+            second = Path(temp_dir) / "b.wav"
+            create_mono_pcm_wav(first, b"\x01\x02" * 4000)
+            create_mono_pcm_wav(second, b"\x01\x03" * 4000)
+
+            self.assertNotEqual(pcm_fingerprint(first), pcm_fingerprint(second))
+
+
+class TestTranscribeDeduplicated(unittest.TestCase):
+    def test_second_call_short_circuits_recognition(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path, b"\x00\x00" * 8000)
+            cache = TranscriptCache(Path(temp_dir) / "cache")
+
+            with patch("dedup.transcribe_file", return_value={"text": "hello"}) as transcribe:
+                first, first_hit = transcribe_deduplicated(wav_path, cache=cache)
+                second, second_hit = transcribe_deduplicated(wav_path, cache=cache)
+
+        transcribe.assert_called_once()
+        self.assertFalse(first_hit)
+        self.assertTrue(second_hit)
+        self.assertEqual(second, {"text": "hello"})
+
+    def test_time_offset_is_applied_to_cached_words(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path, b"\x00\x00" * 8000)
+            cache = TranscriptCache(Path(temp_dir) / "cache")
+            stored = {"text": "hi", "result": [{"word": "hi", "start": 0.5, "end": 0.7}]}
+
+            with patch("dedup.transcribe_file", return_value=stored):
+                transcribe_deduplicated(wav_path, save_words=True, cache=cache)
+                cached, hit = transcribe_deduplicated(
+                    wav_path, save_words=True, cache=cache, time_offset=60.0
+                )
+
+        self.assertTrue(hit)
+        self.assertEqual(cached["result"][0]["start"], 60.5)
+
+    def test_result_store_hit_spills_shifted_words(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path, b"\x00\x00" * 8000)
+            cache = TranscriptCache(Path(temp_dir) / "cache")
+            cache.put(
+                pcm_fingerprint(wav_path),
+                True,
+                {"text": "hi", "result": [{"word": "hi", "start": 0.5, "end": 0.7}]},
+            )
+
+            with JsonlResultStore(Path(temp_dir) / "chunks.jsonl") as store:
+                transcription, hit = transcribe_deduplicated(
+                    wav_path, save_words=True, cache=cache, time_offset=60.0, result_store=store
+                )
+                words = list(store.iter_words())
+
+        self.assertTrue(hit)
+        self.assertEqual(transcription, {"text": "hi"})
+        self.assertEqual(words[0]["start"], 60.5)
+
+    def test_miss_checkpoints_next_to_the_cache_entry(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path, b"\x00\x00" * 8000)
+            cache = TranscriptCache(Path(temp_dir) / "cache")
+            expected = cache.checkpoint_path(pcm_fingerprint(wav_path), False)
+
+            with patch("dedup.transcribe_file", return_value={"text": "hello"}) as transcribe:
+                transcribe_deduplicated(wav_path, cache=cache)
+
+        self.assertEqual(transcribe.call_args.kwargs["checkpoint_path"], expected)
+        # The fingerprint dedup already computed is passed on, not recomputed.
+        self.assertEqual(expected.name.split("_")[0], transcribe.call_args.kwargs["fingerprint"])
+
+    def test_word_level_entry_serves_text_only_request(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            cache = TranscriptCache(Path(temp_dir))
+            cache.put("abc", True, {"text": "hi", "result": [{"word": "hi"}]})
+
+            self.assertEqual(cache.get("abc", save_words=False), {"text": "hi"})
+            self.assertIsNone(cache.get("def", save_words=False))
+
+    def test_put_uses_its_own_temp_file_and_survives_a_lost_replace(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            cache = TranscriptCache(Path(temp_dir))
+            cache.put("abc", False, {"text": "first"})
+
+            with patch("dedup.os.replace", side_effect=FileNotFoundError("raced")):
+                cache.put("abc", False, {"text": "second"})
+
+            self.assertEqual(cache.get("abc"), {"text": "first"})
+            self.assertEqual(list(Path(temp_dir).glob("*.tmp")), [])
+
+    def test_text_only_entry_does_not_serve_word_request(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_dedup_") as temp_dir:
+            cache = TranscriptCache(Path(temp_dir))
+            cache.put("abc", False, {"text": "hi"})
+
+            self.assertIsNone(cache.get("abc", save_words=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
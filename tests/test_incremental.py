@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from incremental import IncrementalTranscriber
+
+
+class FakeStreamingRecognizer:
+    instances: list["FakeStreamingRecognizer"] = []
+
+    def __init__(self, _model, _rate):
+        self.received = b""
+        self.results = 0
+        FakeStreamingRecognizer.instances.append(self)
+
+    def SetWords(self, _save_words):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.received += data
+        return True
+
+    def Result(self):
+        self.results += 1
+        return json.dumps(
+            {
+                "text": f"utterance {self.results}",
+                "result": [{"word": f"w{self.results}", "start": float(self.results), "end": self.results + 0.5}],
+            }
+        )
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self):
+        return json.dumps({"text": "tail", "result": [{"word": "tail", "start": 9.0, "end": 9.5}]})
+
+
+def write_growing_wav_header(path: Path, framerate: int = 16000) -> None:
+    # Data size left at 0, as a recorder does before closing the file.
+    fmt = struct.pack("<HHIIHH", 1, 1, framerate, framerate * 2, 2, 16)
+    header = b"RIFF" + struct.pack("<I", 0) + b"WAVE"
+    header += b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    header += b"data" + struct.pack("<I", 0)
+    path.write_bytes(header)
+
+
+def append_pcm(path: Path, payload: bytes) -> None:
+    with path.open("ab") as handle:
+        handle.write(payload)
+
+
+class TestIncrementalTranscriber(unittest.TestCase):
+    def setUp(self) -> None:
+        FakeStreamingRecognizer.instances = []
+        self._patches = [
+            patch("incremental.get_model", return_value=object()),
+            patch("incremental.KaldiRecognizer", side_effect=FakeStreamingRecognizer),
+        ]
+        for active in self._patches:
+            active.start()
+
+    def tearDown(self) -> None:
+        for active in self._patches:
+            active.stop()
+
+    def test_missing_file_raises(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            IncrementalTranscriber().update(Path("missing.wav"))
+
+    def test_only_appended_pcm_is_decoded(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_incremental_") as temp_dir:
+            wav_path = Path(temp_dir) / "live.wav"
+            write_growing_wav_header(wav_path)
+            transcriber = IncrementalTranscriber(save_words=True)
+
+            append_pcm(wav_path, b"\x01\x00" * 100)
+            first = transcriber.update(wav_path)
+            append_pcm(wav_path, b"\x02\x00" * 50)
+            second = transcriber.update(wav_path)
+            unchanged = transcriber.update(wav_path)
+            full = transcriber.transcript(wav_path)
+
+        self.assertEqual(len(FakeStreamingRecognizer.instances), 1)
+        recognizer = FakeStreamingRecognizer.instances[0]
+        self.assertEqual(recognizer.received, b"\x01\x00" * 100 + b"\x02\x00" * 50)
+        self.assertEqual(first["text"], "utterance 1")
+        self.assertEqual(second["text"], "utterance 2")
+        self.assertEqual([word["word"] for word in second["result"]], ["w2"])
+        self.assertEqual(unchanged["text"], "")
+        self.assertAlmostEqual(second["processed_seconds"], 150 / 16000)
+        self.assertEqual(full["text"], "utterance 1 utterance 2")
+
+    def test_odd_trailing_byte_waits_for_next_call(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_incremental_") as temp_dir:
+            wav_path = Path(temp_dir) / "live.wav"
+            write_growing_wav_header(wav_path)
+            transcriber = IncrementalTranscriber()
+
+            append_pcm(wav_path, b"\x01\x00\x02")
+            transcriber.update(wav_path)
+            append_pcm(wav_path, b"\x00")
+            transcriber.update(wav_path)
+
+        self.assertEqual(FakeStreamingRecognizer.instances[0].received, b"\x01\x00\x02\x00")
+
+    def test_truncated_file_restarts_from_beginning(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_incremental_") as temp_dir:
+            wav_path = Path(temp_dir) / "live.wav"
+            write_growing_wav_header(wav_path)
+            transcriber = IncrementalTranscriber()
+
+            append_pcm(wav_path, b"\x01\x00" * 100)
+            first = transcriber.update(wav_path)
+            write_growing_wav_header(wav_path)
+            append_pcm(wav_path, b"\x03\x00" * 10)
+            restarted = transcriber.update(wav_path)
+
+        self.assertFalse(first["reset"])
+        self.assertTrue(restarted["reset"])
+        self.assertEqual(len(FakeStreamingRecognizer.instances), 2)
+        self.assertEqual(FakeStreamingRecognizer.instances[1].received, b"\x03\x00" * 10)
+
+    def test_idle_path_is_dropped_and_next_delta_resets(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_incremental_") as temp_dir:
+            idle_path = Path(temp_dir) / "idle.wav"
+            other_path = Path(temp_dir) / "other.wav"
+            write_growing_wav_header(idle_path)
+            write_growing_wav_header(other_path)
+            append_pcm(idle_path, b"\x01\x00" * 10)
+            append_pcm(other_path, b"\x02\x00" * 10)
+            transcriber = IncrementalTranscriber(idle_timeout=60)
+
+            with patch("incremental.time.monotonic", return_value=1000.0):
+                transcriber.update(idle_path)
+            with patch("incremental.time.monotonic", return_value=1100.0):
+                transcriber.update(other_path)
+                self.assertEqual(transcriber.transcript(idle_path)["text"], "")
+                again = transcriber.update(idle_path)
+
+        self.assertTrue(again["reset"])
+        self.assertEqual(again["text"], "utterance 1")
+        self.assertEqual(len(FakeStreamingRecognizer.instances), 3)
+
+    def test_finalize_flushes_last_utterance(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_incremental_") as temp_dir:
+            wav_path = Path(temp_dir) / "live.wav"
+            write_growing_wav_header(wav_path)
+            transcriber = IncrementalTranscriber()
+
+            append_pcm(wav_path, b"\x01\x00" * 10)
+            result = transcriber.finalize(wav_path)
+
+        self.assertEqual(result["text"], "utterance 1 tail")
+        self.assertEqual(transcriber.transcript(wav_path)["text"], "")
+
+    def test_non_pcm_header_raises(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_incremental_") as temp_dir:
+            wav_path = Path(temp_dir) / "bad.wav"
+            wav_path.write_bytes(b"ID3\x03" + b"\x00" * 40)
+
+            with self.assertRaises(ValueError):
+                IncrementalTranscriber().update(wav_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+from keywords import spot_keywords
+
+
+class FakeGrammarRecognizer:
+    grammars: list[str] = []
+
+    def __init__(self, _model, _rate, grammar):
+        FakeGrammarRecognizer.grammars.append(grammar)
+        self._accept_calls = 0
+
+    def SetWords(self, _save_words):
+        pass
+
+    def AcceptWaveform(self, _data):
+        self._accept_calls += 1
+        return self._accept_calls == 1
+
+    def Result(self):
+        return json.dumps(
+            {
+                "text": "[unk] refund policy",
+                "result": [
+                    {"word": "[unk]", "start": 0.0, "end": 0.2, "conf": 0.4},
+                    {"word": "refund", "start": 0.3, "end": 0.6, "conf": 0.9},
+                    {"word": "policy", "start": 0.6, "end": 1.0, "conf": 0.8},
+                ],
+            }
+        )
+
+    def FinalResult(self):
+        return json.dumps(
+            {
+                "text": "acme",
+                "result": [{"word": "acme", "start": 1.5, "end": 1.9, "conf": 0.3}],
+            }
+        )
+
+
+def create_mono_pcm_wav(path: Path, frames: int = 8000) -> None:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * frames)
+
+
+class TestSpotKeywords(unittest.TestCase):
+    def setUp(self) -> None:
+        FakeGrammarRecognizer.grammars = []
+
+    def test_empty_phrases_raise(self) -> None:
+        with self.assertRaises(ValueError):
+            spot_keywords(Path("unused.wav"), ["  ", ""])
+
+    def test_missing_file_raises(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            spot_keywords(Path("missing.wav"), ["refund"])
+
+    def test_returns_hits_with_timestamps_and_confidence(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_keywords_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path)
+
+            with patch("keywords.get_model", return_value=object()), patch(
+                "keywords.KaldiRecognizer", side_effect=FakeGrammarRecognizer
+            ):
+                hits = spot_keywords(wav_path, ["Refund  Policy", "ACME"])
+
+        self.assertEqual(
+            json.loads(FakeGrammarRecognizer.grammars[0]),
+            ["refund policy", "acme", "[unk]"],
+        )
+        self.assertEqual(
+            hits,
+            [{"phrase": "refund policy", "start": 0.3, "end": 1.0, "conf": 0.8}],
+        )
+
+    def test_min_confidence_zero_keeps_weak_hits(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_keywords_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path)
+
+            with patch("keywords.get_model", return_value=object()), patch(
+                "keywords.KaldiRecognizer", side_effect=FakeGrammarRecognizer
+            ):
+                hits = spot_keywords(wav_path, ["acme"], min_confidence=0.0)
+
+        self.assertEqual(hits, [{"phrase": "acme", "start": 1.5, "end": 1.9, "conf": 0.3}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import tempfile
+import time
+import unittest
+import urllib.request
+import wave
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from convert import convert_to_wav
+from loadtest import percentile, run_level, serve_directory, synthesize_inputs, synthesize_wav
+
+
+class TestPercentile(unittest.TestCase):
+    def test_interpolates_between_ranks(self) -> None:
+        values = [4.0, 1.0, 3.0, 2.0]
+
+        self.assertEqual(percentile(values, 0.0), 1.0)
+        self.assertEqual(percentile(values, 1.0), 4.0)
+        self.assertAlmostEqual(percentile(values, 0.5), 2.5)
+
+    def test_empty_values_return_zero(self) -> None:
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+
+class TestLoadHarness(unittest.TestCase):
+    def test_synthetic_audio_is_served_locally(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_loadtest_") as temp_dir:
+            root = Path(temp_dir)
+            synthesize_wav(root / "clip.wav", seconds=0.5)
+            server, base_url = serve_directory(root)
+            try:
+                with urllib.request.urlopen(f"{base_url}/clip.wav") as response:
+                    payload = response.read()
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            with wave.open(str(root / "clip.wav"), "rb") as wav_file:
+                self.assertEqual(wav_file.getnframes(), 8000)
+
+        self.assertEqual(payload[:4], b"RIFF")
+
+    def test_load_inputs_go_through_a_decoder(self) -> None:
+        backend = Mock()
+        with tempfile.TemporaryDirectory(prefix="test_loadtest_") as temp_dir:
+            (clip,) = synthesize_inputs(Path(temp_dir), [0.2])
+            with patch("convert.get_decoder", return_value=backend):
+                output_path = convert_to_wav(clip, sample_rate=16000)
+            output_path.parent.rmdir()
+
+        backend.decode.assert_called_once()
+
+    def test_run_level_reports_latency_throughput_and_rtf(self) -> None:
+        def fake_job(_url: str) -> dict:
+            time.sleep(0.01)
+            return {"audio_seconds": 1.0, "stages": {"transcribe": 0.25}}
+
+        report = run_level(["http://unused"], concurrency=2, arrival_rate=0, jobs=6, job=fake_job)
+
+        self.assertEqual(report["completed"], 6)
+        self.assertEqual(report["errors"], 0)
+        self.assertGreaterEqual(report["latency_p99"], report["latency_p50"])
+        self.assertGreater(report["throughput_jobs_per_s"], 0)
+        self.assertAlmostEqual(report["real_time_factor_mean"], 0.25)
+        self.assertGreater(report["peak_rss_mb"], 0)
+
+    def test_run_level_counts_failures(self) -> None:
+        def failing_job(_url: str) -> dict:
+            raise RuntimeError("ffmpeg conversion failed")
+
+        report = run_level(["http://unused"], concurrency=1, arrival_rate=0, jobs=2, job=failing_job)
+
+        self.assertEqual(report["completed"], 0)
+        self.assertEqual(report["errors"], 2)
+        self.assertIn("ffmpeg conversion failed", report["error_samples"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
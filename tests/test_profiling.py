@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from profiling import profiled
+
+
+@profiled("sample_job")
+def sample_job(size: int) -> int:
+    data = [index * 2 for index in range(size)]
+    return sum(data)
+
+
+@profiled("failing_job")
+def failing_job() -> None:
+    raise ValueError("boom")
+
+
+class TestProfiled(unittest.TestCase):
+    def test_disabled_mode_writes_nothing(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_profile_") as temp_dir:
+            with patch.dict(os.environ, {"STT_PROFILE": "", "STT_PROFILE_DIR": temp_dir}):
+                self.assertEqual(sample_job(10), 90)
+
+            self.assertEqual(list(Path(temp_dir).iterdir()), [])
+
+    def test_cpu_and_memory_reports_written_per_job(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_profile_") as temp_dir:
+            with patch.dict(os.environ, {"STT_PROFILE": "cpu,memory", "STT_PROFILE_DIR": temp_dir}):
+                self.assertEqual(sample_job(1000), 999000)
+                sample_job(10)
+
+            job_dirs = sorted(Path(temp_dir).iterdir())
+            self.assertEqual(len(job_dirs), 2)
+            self.assertTrue(job_dirs[0].name.endswith("_sample_job"))
+            produced = {item.name for item in job_dirs[0].iterdir()}
+            self.assertEqual(produced, {"cpu.prof", "cpu.txt", "memory.txt", "timing.txt"})
+            self.assertIn("sample_job", (job_dirs[0] / "cpu.txt").read_text(encoding="utf-8"))
+
+    def test_memory_only_mode_skips_cpu_profile(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_profile_") as temp_dir:
+            with patch.dict(os.environ, {"STT_PROFILE": "memory", "STT_PROFILE_DIR": temp_dir}):
+                sample_job(10)
+
+            (job_dir,) = Path(temp_dir).iterdir()
+            produced = {item.name for item in job_dir.iterdir()}
+
+        self.assertEqual(produced, {"memory.txt", "timing.txt"})
+
+    def test_exceptions_propagate_and_reports_are_still_written(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_profile_") as temp_dir:
+            with patch.dict(os.environ, {"STT_PROFILE": "1", "STT_PROFILE_DIR": temp_dir}):
+                with self.assertRaises(ValueError):
+                    failing_job()
+
+            self.assertEqual(len(list(Path(temp_dir).iterdir())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
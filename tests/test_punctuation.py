@@ -21,6 +21,16 @@ class TestPunctuation(unittest.TestCase):
 
         self.assertEqual(result, ("Hello world. Next.", True, None))
 
+    def test_punctuate_with_word_iterator(self) -> None:
+        words = iter([
+            {"word": "hello", "start": 0.0, "end": 0.3},
+            {"word": "next", "start": 1.6, "end": 1.8},
+        ])
+
+        result = punctuate_text("hello next", words)
+
+        self.assertEqual(result, ("Hello. Next.", True, None))
+
     def test_punctuate_without_words(self) -> None:
         result = punctuate_text("one two three four")
 
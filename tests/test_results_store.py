@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from results_store import (
+    JsonlResultStore,
+    paginate_file,
+    paginate_text,
+    read_page,
+    write_json_export,
+    write_txt_export,
+)
+
+
+class TestJsonlResultStore(unittest.TestCase):
+    def test_chunks_are_read_back_in_order(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_results_") as temp_dir:
+            with JsonlResultStore(Path(temp_dir) / "chunks.jsonl") as store:
+                store.append({"text": "hello", "result": [{"word": "hello", "start": 0.0}]})
+                store.append({"text": ""})
+                store.append({"text": "world", "result": [{"word": "world", "start": 0.5}]})
+
+                self.assertEqual(store.text(), "hello world")
+                self.assertEqual([word["word"] for word in store.iter_words()], ["hello", "world"])
+
+    def test_store_is_readable_while_still_open(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_results_") as temp_dir:
+            store = JsonlResultStore(Path(temp_dir) / "chunks.jsonl")
+            store.append({"text": "partial"})
+
+            self.assertEqual(list(store.iter_chunks()), [{"text": "partial"}])
+            store.close()
+
+
+class TestExports(unittest.TestCase):
+    def test_json_export_matches_json_dumps(self) -> None:
+        words = [
+            {"word": "héllo", "start": 0.0, "end": 0.4, "conf": 1.0},
+            {"word": "world", "start": 0.5, "end": 1.0, "conf": 0.9},
+        ]
+        with tempfile.TemporaryDirectory(prefix="test_results_") as temp_dir:
+            target = write_json_export("Héllo world.", iter(words), Path(temp_dir) / "out.json")
+            streamed = target.read_text(encoding="utf-8")
+
+        expected = json.dumps({"text": "Héllo world.", "result": words}, indent=2, ensure_ascii=False)
+        self.assertEqual(streamed, expected)
+
+    def test_json_export_handles_text_only_and_empty_words(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_results_") as temp_dir:
+            text_only = write_json_export("hi", None, Path(temp_dir) / "a.json").read_text(encoding="utf-8")
+            no_words = write_json_export("hi", [], Path(temp_dir) / "b.json").read_text(encoding="utf-8")
+
+        self.assertEqual(text_only, json.dumps({"text": "hi"}, indent=2))
+        self.assertEqual(no_words, json.dumps({"text": "hi", "result": []}, indent=2))
+
+    def test_txt_export_writes_utf8(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_results_") as temp_dir:
+            target = write_txt_export("Ça va.", Path(temp_dir) / "out.txt")
+
+            self.assertEqual(target.read_bytes(), "Ça va.".encode("utf-8"))
+
+
+class TestPaginateText(unittest.TestCase):
+    def test_pages_break_between_words(self) -> None:
+        pages = paginate_text("alpha beta gamma delta", 11)
+
+        self.assertEqual(pages, ["alpha beta", "gamma delta"])
+        self.assertTrue(all(len(page) <= 11 for page in pages))
+
+    def test_short_text_is_a_single_page(self) -> None:
+        self.assertEqual(paginate_text("hello", 100), ["hello"])
+        self.assertEqual(paginate_text("", 100), [""])
+
+    def test_overlong_word_is_split(self) -> None:
+        self.assertEqual(paginate_text("abcdefgh", 3), ["abc", "def", "gh"])
+
+    def test_file_pages_match_text_pages(self) -> None:
+        text = "  naïve café " + " ".join(f"wörd{index}" for index in range(50)) + "  "
+        with tempfile.TemporaryDirectory(prefix="test_results_store_") as temp_dir:
+            path = write_txt_export(text, Path(temp_dir) / "transcript.txt")
+
+            ranges = paginate_file(path, 40)
+            pages = [read_page(path, byte_range) for byte_range in ranges]
+
+        self.assertEqual(pages, paginate_text(text, 40))
+
+
+if __name__ == "__main__":
+    unittest.main()
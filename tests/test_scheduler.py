@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from scheduler import (
+    PermitPool,
+    ResourceLimits,
+    Scheduler,
+    detect_resource_limits,
+    model_footprint_bytes,
+)
+
+
+class TestDetectResourceLimits(unittest.TestCase):
+    def test_cgroup_v2_limits_are_applied(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_cgroup_") as temp_dir:
+            root = Path(temp_dir)
+            (root / "cpu.max").write_text("50000 100000\n")
+            (root / "memory.max").write_text("1048576\n")
+
+            limits = detect_resource_limits(root)
+
+        # Half a core still yields one usable core.
+        self.assertEqual(limits.cpu_count, 1.0)
+        self.assertEqual(limits.memory_limit_bytes, 1048576)
+
+    def test_cgroup_v1_quota_is_applied(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_cgroup_") as temp_dir:
+            root = Path(temp_dir)
+            (root / "cpu").mkdir()
+            (root / "cpu" / "cpu.cfs_quota_us").write_text("100000\n")
+            (root / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+            (root / "memory").mkdir()
+            (root / "memory" / "memory.limit_in_bytes").write_text("2097152\n")
+
+            limits = detect_resource_limits(root)
+
+        self.assertEqual(limits.cpu_count, 1.0)
+        self.assertEqual(limits.memory_limit_bytes, 2097152)
+
+    def test_unlimited_cgroup_falls_back_to_host(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_cgroup_") as temp_dir:
+            root = Path(temp_dir)
+            (root / "cpu.max").write_text("max 100000\n")
+            (root / "memory.max").write_text("max\n")
+
+            limits = detect_resource_limits(root)
+
+        self.assertGreaterEqual(limits.cpu_count, 1.0)
+
+
+class TestPermitPool(unittest.TestCase):
+    def test_limits_concurrency_and_records_waits(self) -> None:
+        pool = PermitPool("test", permits=2)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def work() -> None:
+            nonlocal active, peak
+            with pool.acquire():
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.02)
+                with lock:
+                    active -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = pool.metrics()
+        self.assertEqual(peak, 2)
+        self.assertEqual(metrics["acquired"], 6)
+        self.assertEqual(metrics["in_use"], 0)
+        self.assertGreater(metrics["max_wait_seconds"], 0.0)
+
+    def test_memory_budget_serializes_large_requests(self) -> None:
+        pool = PermitPool("test", permits=4, memory_budget_bytes=100)
+
+        with pool.acquire(memory_bytes=80):
+            acquired = threading.Event()
+
+            def work() -> None:
+                with pool.acquire(memory_bytes=80):
+                    acquired.set()
+
+            thread = threading.Thread(target=work)
+            thread.start()
+            self.assertFalse(acquired.wait(0.05))
+
+        thread.join(timeout=1)
+        self.assertTrue(acquired.is_set())
+
+    def test_oversized_request_does_not_deadlock(self) -> None:
+        pool = PermitPool("test", permits=1, memory_budget_bytes=10)
+
+        with pool.acquire(memory_bytes=1000):
+            self.assertEqual(pool.metrics()["in_use"], 1)
+
+
+class TestScheduler(unittest.TestCase):
+    def test_shared_model_is_charged_once_not_per_recognizer(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_model_") as temp_dir:
+            model_dir = Path(temp_dir)
+            with (model_dir / "graph.fst").open("wb") as handle:
+                handle.truncate(2 << 30)
+            model_footprint_bytes.cache_clear()
+
+            scheduler = Scheduler(
+                limits=ResourceLimits(cpu_count=8, memory_limit_bytes=4 << 30),
+                default_model_path=model_dir,
+            )
+
+            self.assertEqual(scheduler.decode.permits, 8)
+            self.assertEqual(scheduler.recognition.permits, 8)
+
+            with scheduler.recognition_slot(model_dir), scheduler.recognition_slot(model_dir):
+                metrics = scheduler.metrics()["recognition"]
+
+        self.assertEqual(metrics["in_use"], 2)
+        self.assertEqual(metrics["reserved_bytes"], 2 << 30)
+
+    def test_recognition_permits_limited_by_memory_left_after_model(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_model_") as temp_dir:
+            model_dir = Path(temp_dir)
+            (model_dir / "graph.fst").write_bytes(b"\x00" * 1000)
+            model_footprint_bytes.cache_clear()
+
+            scheduler = Scheduler(
+                limits=ResourceLimits(cpu_count=8, memory_limit_bytes=2500),
+                default_model_path=model_dir,
+                recognizer_memory_bytes=300,
+            )
+
+        # (2500 * 0.8 - 1000) // 300
+        self.assertEqual(scheduler.recognition.permits, 3)
+
+    def test_explicit_permits_override_detection(self) -> None:
+        scheduler = Scheduler(
+            limits=ResourceLimits(cpu_count=8, memory_limit_bytes=None),
+            decode_permits=3,
+            recognition_permits=1,
+        )
+
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["decode"]["permits"], 3)
+        self.assertEqual(metrics["recognition"]["permits"], 1)
+        self.assertEqual(metrics["streaming"]["permits"], 8)
+
+    def test_streaming_does_not_wait_for_busy_recognition_pool(self) -> None:
+        scheduler = Scheduler(
+            limits=ResourceLimits(cpu_count=2, memory_limit_bytes=None),
+            recognition_permits=1,
+        )
+
+        with scheduler.recognition_slot():
+            acquired = threading.Event()
+
+            def stream_frame():
+                with scheduler.streaming_slot():
+                    acquired.set()
+
+            worker = threading.Thread(target=stream_frame)
+            worker.start()
+            worker.join(timeout=2)
+
+        self.assertTrue(acquired.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from search_index import TranscriptIndex, normalize_tokens
+
+
+def words_for(text: str, start: float = 0.0, step: float = 0.5) -> list[dict]:
+    return [
+        {"word": word, "start": start + index * step, "end": start + index * step + 0.4, "conf": 1.0}
+        for index, word in enumerate(text.split())
+    ]
+
+
+class TestTranscriptIndex(unittest.TestCase):
+    def test_phrase_query_returns_millisecond_offsets(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_index_") as temp_dir:
+            with TranscriptIndex(Path(temp_dir) / "index.sqlite3") as index:
+                index.add("meeting", words_for("we should ship the release today", start=60.0))
+                index.add("standup", words_for("the release is blocked"))
+
+                matches = index.search("The release")
+                shipped = index.search("ship the release")
+
+        self.assertEqual(
+            matches,
+            [
+                {"transcript": "meeting", "start_ms": 61500, "end_ms": 62400},
+                {"transcript": "standup", "start_ms": 0, "end_ms": 900},
+            ],
+        )
+        self.assertEqual(shipped, [{"transcript": "meeting", "start_ms": 61000, "end_ms": 62400}])
+
+    def test_words_must_be_consecutive(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_index_") as temp_dir:
+            with TranscriptIndex(Path(temp_dir) / "index.sqlite3") as index:
+                index.add("a", words_for("release the ship"))
+
+                self.assertEqual(index.search("ship the release"), [])
+                self.assertEqual(index.search("unknownword"), [])
+                self.assertEqual(index.search("  ...  "), [])
+
+    def test_reindexing_replaces_previous_postings(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_index_") as temp_dir:
+            with TranscriptIndex(Path(temp_dir) / "index.sqlite3") as index:
+                index.add("a", words_for("old words here"))
+                index.add("a", words_for("new words here"))
+
+                self.assertEqual(index.search("old"), [])
+                self.assertEqual(len(index.search("new words")), 1)
+                self.assertEqual(index.stats()["transcripts"], 1)
+
+                self.assertTrue(index.remove("a"))
+                self.assertEqual(index.search("new"), [])
+
+    def test_add_file_skips_unchanged_transcripts(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_index_") as temp_dir:
+            transcript = Path(temp_dir) / "call.json"
+            transcript.write_text(json.dumps({"text": "hello there", "result": words_for("hello there")}))
+
+            with TranscriptIndex(Path(temp_dir) / "index.sqlite3") as index:
+                self.assertTrue(index.add_file(transcript, name="call"))
+                self.assertFalse(index.add_file(transcript, name="call"))
+
+                transcript.write_text(json.dumps({"text": "goodbye", "result": words_for("goodbye")}))
+                os.utime(transcript, ns=(0, 1))
+                self.assertTrue(index.add_file(transcript, name="call"))
+                self.assertEqual(index.search("hello"), [])
+
+    def test_text_only_and_corrupt_files_are_recorded_and_skipped(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_index_") as temp_dir:
+            text_only = Path(temp_dir) / "entry_text.json"
+            corrupt = Path(temp_dir) / "torn.json"
+            text_only.write_text(json.dumps({"text": "hello there"}))
+            corrupt.write_text('{"text": "hel')
+
+            with TranscriptIndex(Path(temp_dir) / "index.sqlite3") as index:
+                self.assertFalse(index.add_file(text_only))
+                self.assertFalse(index.add_file(corrupt))
+                recorded = index.stats()
+
+                with patch.object(Path, "read_text", side_effect=AssertionError("re-read")):
+                    self.assertFalse(index.add_file(text_only))
+                    self.assertFalse(index.add_file(corrupt))
+
+        self.assertEqual(recorded, {"transcripts": 2, "words": 0, "terms": 0})
+
+    def test_index_persists_across_reopen(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_index_") as temp_dir:
+            path = Path(temp_dir) / "index.sqlite3"
+            with TranscriptIndex(path) as index:
+                index.add("a", words_for("persist me"))
+            with TranscriptIndex(path) as index:
+                self.assertEqual(len(index.search("persist me")), 1)
+
+    def test_normalize_tokens_drops_punctuation_and_case(self) -> None:
+        self.assertEqual(normalize_tokens("Don't STOP, now!"), ["don't", "stop", "now"])
+
+
+if __name__ == "__main__":
+    unittest.main()
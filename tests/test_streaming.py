@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from streaming import FRAME_HEADER, StreamingServer
+
+
+class FakeLiveRecognizer:
+    def __init__(self, _model, _rate):
+        self._frames = 0
+
+    def SetWords(self, _save_words):
+        pass
+
+    def AcceptWaveform(self, _data):
+        self._frames += 1
+        return self._frames % 3 == 0
+
+    def Result(self):
+        return json.dumps({"text": f"utterance {self._frames // 3}"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": f"partial {self._frames}"})
+
+    def FinalResult(self):
+        return json.dumps({"text": "tail"})
+
+
+class FakeVerboseRecognizer(FakeLiveRecognizer):
+    def PartialResult(self):
+        # Large enough that a client which stops reading fills the socket buffers.
+        return json.dumps({"partial": f"{self._frames} " + "x" * 65536})
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_messages(reader: asyncio.StreamReader) -> list[dict]:
+    messages = []
+    while True:
+        line = await asyncio.wait_for(reader.readline(), 5)
+        if not line:
+            return messages
+        messages.append(json.loads(line))
+
+
+class TestStreamingServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self._patches = [
+            patch("streaming.get_model", return_value=object()),
+            patch("streaming.KaldiRecognizer", side_effect=FakeLiveRecognizer),
+        ]
+        for active in self._patches:
+            active.start()
+
+    def tearDown(self) -> None:
+        for active in self._patches:
+            active.stop()
+
+    def _run(self, scenario, **server_options):
+        async def runner():
+            server = StreamingServer(port=0, **server_options)
+            await server.start()
+            try:
+                return await scenario(server)
+            finally:
+                await server.close()
+
+        return asyncio.run(runner())
+
+    def test_streams_partials_and_finals(self) -> None:
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            for _ in range(4):
+                writer.write(frame(b"\x00\x00" * 160))
+            writer.write(frame(b""))
+            await writer.drain()
+            messages = await read_messages(reader)
+            writer.close()
+            return messages
+
+        messages = self._run(scenario)
+
+        self.assertEqual(
+            messages,
+            [
+                {"type": "partial", "partial": "partial 1"},
+                {"type": "partial", "partial": "partial 2"},
+                {"type": "final", "text": "utterance 1"},
+                {"type": "partial", "partial": "partial 4"},
+                {"type": "final", "text": "tail"},
+            ],
+        )
+
+    def test_concurrent_clients_get_independent_recognizers(self) -> None:
+        async def client(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for _ in range(3):
+                writer.write(frame(b"\x00\x00" * 160))
+            writer.write(frame(b""))
+            await writer.drain()
+            messages = await read_messages(reader)
+            writer.close()
+            return messages
+
+        async def scenario(server):
+            return await asyncio.gather(*(client(server.port) for _ in range(5)))
+
+        results = self._run(scenario)
+
+        for messages in results:
+            self.assertIn({"type": "final", "text": "utterance 1"}, messages)
+
+    def test_idle_connection_times_out(self) -> None:
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            messages = await read_messages(reader)
+            writer.close()
+            return messages
+
+        messages = self._run(scenario, idle_timeout=0.1)
+
+        self.assertEqual(messages, [{"type": "error", "error": "Connection idle timeout."}])
+
+    def test_oversized_frame_is_rejected(self) -> None:
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(FRAME_HEADER.pack(1024))
+            await writer.drain()
+            messages = await read_messages(reader)
+            writer.close()
+            return messages
+
+        messages = self._run(scenario, max_frame_bytes=512)
+
+        self.assertEqual(messages[0]["type"], "error")
+        self.assertIn("exceeds limit", messages[0]["error"])
+
+    def test_client_that_stops_reading_is_dropped(self) -> None:
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            for _ in range(400):
+                writer.write(frame(b"\x00\x00" * 160))
+            await asyncio.sleep(3)
+            handlers = [
+                task
+                for task in asyncio.all_tasks()
+                if getattr(task.get_coro(), "__qualname__", "") == "StreamingServer._handle_client"
+            ]
+            writer.transport.abort()
+            return handlers
+
+        with patch("streaming.KaldiRecognizer", side_effect=FakeVerboseRecognizer):
+            handlers = self._run(scenario, idle_timeout=0.5)
+
+        self.assertEqual(handlers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
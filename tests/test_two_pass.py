@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+from two_pass import LowConfidenceSpan, find_low_confidence_spans, transcribe_two_pass
+
+
+FIRST_PASS_WORDS = [
+    {"word": "please", "start": 0.0, "end": 0.4, "conf": 0.95},
+    {"word": "cancel", "start": 0.5, "end": 0.9, "conf": 0.9},
+    {"word": "my", "start": 2.0, "end": 2.2, "conf": 0.3},
+    {"word": "sub", "start": 2.2, "end": 2.5, "conf": 0.2},
+    {"word": "today", "start": 3.5, "end": 3.9, "conf": 0.97},
+]
+
+
+class FakeLargeRecognizer:
+    def __init__(self, _model, _rate):
+        pass
+
+    def SetWords(self, _save_words):
+        pass
+
+    def AcceptWaveform(self, _data):
+        return False
+
+    def FinalResult(self):
+        # Times are relative to the start of the re-decoded span.
+        return json.dumps(
+            {
+                "text": "my subscription",
+                "result": [
+                    {"word": "my", "start": 0.3, "end": 0.5, "conf": 0.9},
+                    {"word": "subscription", "start": 0.5, "end": 1.0, "conf": 0.85},
+                ],
+            }
+        )
+
+
+class FakeOverreachingRecognizer(FakeLargeRecognizer):
+    def FinalResult(self):
+        # "today" sits in the span's trailing padding and belongs to the first pass.
+        return json.dumps(
+            {
+                "text": "my subscription today",
+                "result": [
+                    {"word": "my", "start": 0.3, "end": 0.5, "conf": 0.9},
+                    {"word": "subscription", "start": 0.5, "end": 1.0, "conf": 0.85},
+                    {"word": "today", "start": 1.05, "end": 1.2, "conf": 0.5},
+                ],
+            }
+        )
+
+
+class FakeSingleWordRecognizer(FakeLargeRecognizer):
+    def FinalResult(self):
+        # Decoding starts inside "cancel", so the large model does not re-emit it.
+        return json.dumps({"text": "my", "result": [{"word": "my", "start": 0.3, "end": 0.5, "conf": 0.9}]})
+
+
+def create_mono_pcm_wav(path: Path, seconds: float = 4.0) -> None:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * int(16000 * seconds))
+
+
+class TestFindLowConfidenceSpans(unittest.TestCase):
+    def test_merges_adjacent_weak_words_and_pads(self) -> None:
+        spans = find_low_confidence_spans(FIRST_PASS_WORDS, threshold=0.6, padding=0.3)
+
+        self.assertEqual(len(spans), 1)
+        self.assertAlmostEqual(spans[0].start, 1.7)
+        self.assertAlmostEqual(spans[0].end, 2.8)
+        self.assertAlmostEqual(spans[0].weak_start, 2.0)
+        self.assertAlmostEqual(spans[0].weak_end, 2.5)
+
+    def test_confident_words_produce_no_spans(self) -> None:
+        self.assertEqual(find_low_confidence_spans(FIRST_PASS_WORDS[:2]), [])
+
+    def test_spans_are_clamped_to_duration(self) -> None:
+        words = [{"word": "end", "start": 9.8, "end": 10.0, "conf": 0.1}]
+
+        spans = find_low_confidence_spans(words, padding=0.5, duration=10.0)
+
+        self.assertEqual(spans, [LowConfidenceSpan(9.3, 10.0, 9.8, 10.0)])
+
+
+class TestTranscribeTwoPass(unittest.TestCase):
+    def test_requires_large_model(self) -> None:
+        previous = os.environ.pop("VOSK_LARGE_MODEL_PATH", None)
+        try:
+            with self.assertRaises(ValueError):
+                transcribe_two_pass(Path("audio.wav"))
+        finally:
+            if previous is not None:
+                os.environ["VOSK_LARGE_MODEL_PATH"] = previous
+
+    def test_splices_second_pass_words_with_absolute_timestamps(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_two_pass_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path)
+            first_pass = {"text": "please cancel my sub today", "result": list(FIRST_PASS_WORDS)}
+
+            with patch("two_pass.transcribe_file", return_value=first_pass), patch(
+                "two_pass.get_model", return_value=object()
+            ), patch("two_pass.KaldiRecognizer", side_effect=FakeLargeRecognizer):
+                result = transcribe_two_pass(wav_path, large_model_path=Path(temp_dir))
+
+        self.assertEqual(result["text"], "please cancel my subscription today")
+        subscription = result["result"][3]
+        self.assertEqual(subscription["word"], "subscription")
+        self.assertAlmostEqual(subscription["start"], 2.2)
+        self.assertAlmostEqual(result["second_pass"]["seconds"], 1.1)
+        self.assertAlmostEqual(result["second_pass"]["ratio"], 0.275)
+
+    def test_second_pass_words_outside_span_are_dropped(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_two_pass_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path)
+            first_pass = {"text": "please cancel my sub today", "result": list(FIRST_PASS_WORDS)}
+
+            with patch("two_pass.transcribe_file", return_value=first_pass), patch(
+                "two_pass.get_model", return_value=object()
+            ), patch("two_pass.KaldiRecognizer", side_effect=FakeOverreachingRecognizer):
+                result = transcribe_two_pass(wav_path, large_model_path=Path(temp_dir))
+
+        self.assertEqual(result["text"], "please cancel my subscription today")
+        self.assertEqual(result["result"][-1]["conf"], 0.97)
+
+    def test_confident_word_in_padding_is_kept(self) -> None:
+        words = [
+            {"word": "please", "start": 0.0, "end": 0.4, "conf": 0.95},
+            {"word": "cancel", "start": 0.5, "end": 0.9, "conf": 0.95},
+            {"word": "my", "start": 1.0, "end": 1.2, "conf": 0.3},
+            {"word": "today", "start": 3.5, "end": 3.9, "conf": 0.97},
+        ]
+        with tempfile.TemporaryDirectory(prefix="test_two_pass_") as temp_dir:
+            wav_path = Path(temp_dir) / "audio.wav"
+            create_mono_pcm_wav(wav_path)
+            first_pass = {"text": "please cancel my today", "result": words}
+
+            with patch("two_pass.transcribe_file", return_value=first_pass), patch(
+                "two_pass.get_model", return_value=object()
+            ), patch("two_pass.KaldiRecognizer", side_effect=FakeSingleWordRecognizer):
+                result = transcribe_two_pass(wav_path, large_model_path=Path(temp_dir))
+
+        self.assertAlmostEqual(result["second_pass"]["spans"][0]["start"], 0.7)
+        self.assertEqual(result["text"], "please cancel my today")
+        self.assertEqual(result["result"][2]["conf"], 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
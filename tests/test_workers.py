@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import gc
+import os
+import tempfile
+import time
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+from workers import STALE_CHECKPOINT_SECONDS, PreforkPool
+
+
+def square(value: int) -> tuple[int, int]:
+    return value * value, os.getpid()
+
+
+def fail(message: str) -> None:
+    raise ValueError(message)
+
+
+def parent_pid(crash_first: str) -> int:
+    marker_path = Path(crash_first)
+    if not marker_path.exists():
+        marker_path.touch()
+        os._exit(3)
+    return os.getppid()
+
+
+def crash(_value: int) -> None:
+    os._exit(3)
+
+
+def crash_once(marker: str) -> str:
+    marker_path = Path(marker)
+    if not marker_path.exists():
+        marker_path.touch()
+        os._exit(3)
+    return "recovered"
+
+
+def crash_once_recording(wav_path: str, marker: str, checkpoint_path: Path, fingerprint: str) -> str:
+    with Path(marker).open("a") as handle:
+        handle.write(f"{checkpoint_path}\n")
+    if len(Path(marker).read_text().splitlines()) == 1:
+        os._exit(3)
+    return "recovered"
+
+
+def record_checkpoint(wav_path: str, save_words: bool = False, checkpoint_path: Path | None = None, fingerprint: str = "") -> str:
+    return str(checkpoint_path)
+
+
+def create_mono_pcm_wav(path: Path, payload: bytes) -> Path:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(payload)
+    return path
+
+
+class TestPreforkPool(unittest.TestCase):
+    def test_jobs_run_in_forked_workers(self) -> None:
+        with PreforkPool(workers=2, handler=square, preload_model=False) as pool:
+            results = [pool.submit(value).result(timeout=10) for value in range(6)]
+            pids = set(pool.pids)
+
+        self.assertEqual([value for value, _ in results], [0, 1, 4, 9, 16, 25])
+        self.assertTrue({pid for _, pid in results} <= pids)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_model_is_loaded_once_in_the_parent(self) -> None:
+        loads: list[int] = []
+        with patch("workers.get_model", side_effect=lambda: loads.append(os.getpid())):
+            with PreforkPool(workers=2, handler=square) as pool:
+                pool.submit(2).result(timeout=10)
+
+        self.assertEqual(loads, [os.getpid()])
+
+    def test_job_exception_reaches_the_caller(self) -> None:
+        with PreforkPool(workers=1, handler=fail, preload_model=False) as pool:
+            with self.assertRaisesRegex(ValueError, "bad input"):
+                pool.submit("bad input").result(timeout=10)
+            self.assertEqual(pool.restarts, 0)
+
+    def test_crashed_worker_is_replaced_and_job_fails_after_retries(self) -> None:
+        with PreforkPool(workers=1, handler=crash, preload_model=False, max_retries=1) as pool:
+            first_pid = pool.pids[0]
+            with self.assertRaisesRegex(RuntimeError, "exited with code 3 after 2 attempt"):
+                pool.submit(1).result(timeout=10)
+            self.assertEqual(pool.restarts, 2)
+            self.assertNotIn(first_pid, pool.pids)
+            self.assertEqual(len(pool.pids), 1)
+
+    def test_job_in_flight_on_crash_is_retried(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_workers_") as temp_dir:
+            marker = str(Path(temp_dir) / "crashed")
+            with PreforkPool(workers=1, handler=crash_once, preload_model=False) as pool:
+                result = pool.submit(marker).result(timeout=10)
+                restarts = pool.restarts
+
+        self.assertEqual(result, "recovered")
+        self.assertEqual(restarts, 1)
+
+    def test_retry_reuses_the_job_checkpoint(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_workers_") as temp_dir:
+            marker = Path(temp_dir) / "attempts"
+            wav_path = create_mono_pcm_wav(Path(temp_dir) / "audio.wav", b"\x01\x00" * 1600)
+            with PreforkPool(
+                workers=1,
+                handler=crash_once_recording,
+                preload_model=False,
+                checkpoint_dir=Path(temp_dir) / "checkpoints",
+            ) as pool:
+                self.assertEqual(pool.submit(str(wav_path), str(marker)).result(timeout=10), "recovered")
+
+            attempts = marker.read_text().splitlines()
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(attempts[0], attempts[1])
+        self.assertTrue(attempts[0].startswith(str(Path(temp_dir) / "checkpoints")))
+
+    def test_checkpoint_name_survives_a_new_pool(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_workers_") as temp_dir:
+            checkpoint_dir = Path(temp_dir) / "checkpoints"
+            first = create_mono_pcm_wav(Path(temp_dir) / "first.wav", b"\x01\x00" * 1600)
+            reconverted = create_mono_pcm_wav(Path(temp_dir) / "again.wav", b"\x01\x00" * 1600)
+            other = create_mono_pcm_wav(Path(temp_dir) / "other.wav", b"\x02\x00" * 1600)
+
+            def submit_once(wav_path: Path, **kwargs) -> str:
+                with PreforkPool(
+                    workers=1, handler=record_checkpoint, preload_model=False, checkpoint_dir=checkpoint_dir
+                ) as pool:
+                    return pool.submit(str(wav_path), **kwargs).result(timeout=10)
+
+            names = [
+                submit_once(first),
+                submit_once(reconverted),
+                submit_once(first, save_words=True),
+                submit_once(other),
+            ]
+
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(len(set(names)), 3)
+
+    def test_start_removes_stale_checkpoints(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_workers_") as temp_dir:
+            checkpoint_dir = Path(temp_dir)
+            stale = checkpoint_dir / "job-old.checkpoint"
+            fresh = checkpoint_dir / "job-new.checkpoint"
+            for path in (stale, fresh):
+                path.write_text("{}\n")
+                path.with_name(path.name + ".lock").touch()
+            old = time.time() - STALE_CHECKPOINT_SECONDS - 60
+            for path in (stale, stale.with_name(stale.name + ".lock")):
+                os.utime(path, (old, old))
+
+            PreforkPool(workers=1, handler=square, preload_model=False, checkpoint_dir=checkpoint_dir).start().shutdown()
+
+            self.assertFalse(stale.exists())
+            self.assertFalse(stale.with_name(stale.name + ".lock").exists())
+            self.assertTrue(fresh.exists())
+
+    def test_replacement_workers_are_forked_by_the_zygote(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_workers_") as temp_dir:
+            marker = str(Path(temp_dir) / "crashed")
+            with PreforkPool(workers=1, handler=parent_pid, preload_model=False) as pool:
+                frozen_after_start = gc.get_freeze_count()
+                forked_by = pool.submit(marker).result(timeout=10)
+                zygote_pid = pool._zygote.pid
+
+        self.assertEqual(forked_by, zygote_pid)
+        self.assertNotEqual(forked_by, os.getpid())
+        self.assertEqual(frozen_after_start, 0)
+
+    def test_submit_after_shutdown_raises(self) -> None:
+        pool = PreforkPool(workers=1, handler=square, preload_model=False).start()
+        pool.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            pool.submit(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from vosk import KaldiRecognizer
+
+from core import _recognize, get_model, offset_words, open_pcm_wav, transcribe_file
+from scheduler import get_scheduler
+
+
+def _resolve_large_model_path(large_model_path: Path | None) -> Path:
+    if large_model_path is not None:
+        return Path(large_model_path)
+
+    configured = os.getenv("VOSK_LARGE_MODEL_PATH")
+    if not configured:
+        raise ValueError(
+            "Two-pass transcription needs a second model. "
+            "Pass large_model_path or set VOSK_LARGE_MODEL_PATH."
+        )
+    return Path(configured)
+
+
+@dataclass(frozen=True)
+class LowConfidenceSpan:
+    """Padded audio window to re-decode (``start``..``end``) around the weak words it replaces."""
+
+    start: float
+    end: float
+    weak_start: float
+    weak_end: float
+
+
+def find_low_confidence_spans(
+    words: list[dict],
+    threshold: float = 0.6,
+    padding: float = 0.3,
+    merge_gap: float = 1.0,
+    duration: float | None = None,
+) -> list[LowConfidenceSpan]:
+    """Return padded, merged spans around words scoring below threshold."""
+    spans: list[LowConfidenceSpan] = []
+
+    for word in words:
+        confidence = word.get("conf")
+        start, end = word.get("start"), word.get("end")
+        if not isinstance(confidence, (int, float)) or confidence >= threshold:
+            continue
+        if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+            continue
+
+        span_start = max(0.0, start - padding)
+        span_end = end + padding
+        if duration is not None:
+            span_end = min(span_end, duration)
+
+        if spans and span_start - spans[-1].end <= merge_gap:
+            previous = spans[-1]
+            spans[-1] = LowConfidenceSpan(
+                previous.start,
+                max(previous.end, span_end),
+                previous.weak_start,
+                max(previous.weak_end, end),
+            )
+        else:
+            spans.append(LowConfidenceSpan(span_start, span_end, start, end))
+
+    return spans
+
+
+def _redecode_span(wav_path: Path, model_path: Path, start: float, end: float) -> list[dict]:
+    with open_pcm_wav(wav_path) as wav_file:
+        rate = wav_file.getframerate()
+        start_frame = min(int(start * rate), wav_file.getnframes())
+        frame_count = max(0, int(end * rate) - start_frame)
+        wav_file.setpos(start_frame)
+
+        with get_scheduler().recognition_slot(model_path):
+            recognizer = KaldiRecognizer(get_model(model_path), rate)
+            recognizer.SetWords(True)
+            chunks = _recognize(recognizer, wav_file, frame_count)
+
+    words: list[dict] = []
+    for chunk in chunks:
+        chunk_words = chunk.get("result")
+        if isinstance(chunk_words, list):
+            words.extend(chunk_words)
+
+    return offset_words(words, start_frame / rate)
+
+
+def _word_midpoint(word: dict) -> float:
+    return (float(word.get("start", 0.0)) + float(word.get("end", 0.0))) / 2
+
+
+def transcribe_two_pass(
+    wav_path: Path,
+    large_model_path: Path | None = None,
+    threshold: float = 0.6,
+    padding: float = 0.3,
+    merge_gap: float = 1.0,
+) -> dict:
+    """
+    Transcribe with the default (small) model, then re-decode weak spans with a larger one.
+
+    Args:
+        wav_path: Mono 16-bit PCM WAV file
+        large_model_path: Model used for the second pass (default: VOSK_LARGE_MODEL_PATH)
+        threshold: Words with ``conf`` below this trigger a second pass
+        padding: Seconds of context added on both sides of a weak span
+        merge_gap: Spans closer than this many seconds are decoded together
+
+    Returns:
+        ``text`` and ``result`` spliced from both passes, plus a ``second_pass``
+        report with the re-decoded spans, their total seconds and share of the audio
+
+    Raises:
+        ValueError: If no large model is configured
+        FileNotFoundError: If the WAV file or a model directory does not exist
+    """
+    model_path = _resolve_large_model_path(large_model_path)
+    source_path = Path(wav_path)
+
+    first_pass = transcribe_file(source_path, save_words=True)
+    words = first_pass.get("result", [])
+
+    with open_pcm_wav(source_path) as wav_file:
+        duration = wav_file.getnframes() / wav_file.getframerate()
+
+    spans = find_low_confidence_spans(words, threshold, padding, merge_gap, duration)
+
+    for span in spans:
+        # The padding is only decoding context: the large model hears just part
+        # of the words there, so both passes are split at the weak words' own
+        # range and words centred in the padding stay with the first pass.
+        def is_weak(word: dict) -> bool:
+            return span.weak_start <= _word_midpoint(word) < span.weak_end
+
+        replacement = [
+            word
+            for word in _redecode_span(source_path, model_path, span.start, span.end)
+            if is_weak(word)
+        ]
+        kept = [word for word in words if not is_weak(word)]
+        words = sorted(kept + replacement, key=lambda word: word.get("start", 0.0))
+
+    second_pass_seconds = sum(span.end - span.start for span in spans)
+
+    return {
+        "text": " ".join(str(word.get("word", "")) for word in words).strip(),
+        "result": words,
+        "second_pass": {
+            "spans": [{"start": span.start, "end": span.end} for span in spans],
+            "seconds": round(second_pass_seconds, 3),
+            "ratio": round(second_pass_seconds / duration, 4) if duration else 0.0,
+        },
+    }
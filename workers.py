@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from multiprocessing import reduction
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Callable
+
+from checkpoint import checkpoint_lock
+from core import get_model, pcm_fingerprint, transcribe_file
+from dedup import _model_tag
+from scheduler import _env_int, detect_resource_limits
+
+
+# Checkpoints of jobs that are never submitted again are removed after this long.
+STALE_CHECKPOINT_SECONDS = 7 * 24 * 3600
+# Handler arguments that do not change what a job transcribes.
+_UNKEYED_ARGUMENTS = {"checkpoint_path", "checkpoint_interval", "fingerprint", "result_store"}
+
+
+@dataclass
+class _Job:
+    future: Future
+    args: tuple
+    kwargs: dict
+    attempts: int = 0
+    checkpoint_path: Path | None = None
+
+
+@dataclass
+class _Worker:
+    pid: int
+    connection: Connection
+    job: _Job | None = field(default=None)
+    # False once the pipe hit EOF; the zygote's exit report then replaces it.
+    alive: bool = True
+
+
+def _picklable(exc: BaseException) -> BaseException:
+    try:
+        pickle.dumps(exc)
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+    return exc
+
+
+def _worker_main(handler: Callable, connection: Connection) -> None:
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        args, kwargs = message
+        try:
+            result = handler(*args, **kwargs)
+        except Exception as exc:
+            connection.send(("error", _picklable(exc)))
+            continue
+
+        try:
+            connection.send(("done", result))
+        except Exception as exc:
+            connection.send(("error", RuntimeError(f"Could not return result: {exc}")))
+
+
+def _fork_worker(handler: Callable, control: Connection) -> None:
+    parent_end, child_end = multiprocessing.Pipe()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            control.close()
+            parent_end.close()
+            _worker_main(handler, child_end)
+        except BaseException:
+            exit_code = 1
+        finally:
+            # Skip the zygote's atexit and multiprocessing cleanup.
+            os._exit(exit_code)
+
+    child_end.close()
+    control.send(("spawned", pid))
+    reduction.send_handle(control, parent_end.fileno(), os.getppid())
+    parent_end.close()
+
+
+def _report_exits(control: Connection) -> None:
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        control.send(("exited", pid, os.waitstatus_to_exitcode(status)))
+
+
+def _zygote_main(handler: Callable, control: Connection, parent_end: Connection) -> None:
+    """
+    Fork workers on request from a process that never starts a thread.
+
+    The pool's parent may run any number of threads (its monitor, the app's
+    own), and forking there can copy a lock some other thread holds. The
+    zygote is forked once, at ``start()``, and every worker (including
+    replacements) is forked from it instead. It also reaps the workers and
+    reports their exit codes back to the parent.
+    """
+    # Holding the parent's end would hide the parent's EOF from this loop.
+    parent_end.close()
+
+    while True:
+        if wait([control], timeout=0.2):
+            try:
+                message = control.recv()
+            except EOFError:
+                return
+            if message is None:
+                return
+            _fork_worker(handler, control)
+        _report_exits(control)
+
+
+def _job_checkpoint_name(handler: Callable, args: tuple, kwargs: dict) -> tuple[str, str]:
+    """
+    Name a job's checkpoint after its audio, model and options.
+
+    The same job submitted to any pool, including one started after the
+    parent crashed or was redeployed, gets the same name and so resumes.
+
+    Returns:
+        The checkpoint file name and the audio's ``pcm_fingerprint``
+    """
+    bound = inspect.signature(handler).bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    wav_path = arguments.pop(next(iter(arguments)))
+    fingerprint = pcm_fingerprint(wav_path)
+
+    options = {name: value for name, value in arguments.items() if name not in _UNKEYED_ARGUMENTS}
+    key = json.dumps({"audio": fingerprint, "model": _model_tag(), "options": options}, sort_keys=True, default=str)
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return f"job-{digest}.checkpoint", fingerprint
+
+
+def _discard_checkpoint(checkpoint_path: Path | None) -> None:
+    if checkpoint_path is None:
+        return
+    with checkpoint_lock(checkpoint_path) as owned:
+        # A concurrent job for the same audio may still be writing it.
+        if owned:
+            checkpoint_path.unlink(missing_ok=True)
+            checkpoint_path.with_name(checkpoint_path.name + ".lock").unlink(missing_ok=True)
+
+
+def _remove_stale_checkpoints(checkpoint_dir: Path, max_age: float) -> None:
+    cutoff = time.time() - max_age
+    for lock_path in checkpoint_dir.glob("job-*.checkpoint.lock"):
+        checkpoint_path = lock_path.with_name(lock_path.name[: -len(".lock")])
+        try:
+            modified = max(
+                path.stat().st_mtime for path in (checkpoint_path, lock_path) if path.exists()
+            )
+        except (OSError, ValueError):
+            continue
+        if modified < cutoff:
+            _discard_checkpoint(checkpoint_path)
+
+
+def _default_worker_count() -> int:
+    configured = _env_int("STT_PREFORK_WORKERS")
+    if configured is not None:
+        return configured
+    return max(1, int(detect_resource_limits().cpu_count))
+
+
+class PreforkPool:
+    """
+    Worker processes forked from a parent that has already loaded the model.
+
+    The parent calls ``get_model()`` once and then forks a single-threaded
+    zygote, which forks every worker. All of them share the model's memory
+    copy-on-write instead of loading their own copy. Kaldi only reads the
+    model after loading it, so those pages stay shared.
+    Jobs wait in a queue in the parent and are handed to idle workers over
+    per-worker pipes. That way the parent always knows which job each worker
+    holds. A worker that dies is replaced, and its job is retried up to
+    ``max_retries`` times before its future fails. Each ``transcribe_file``
+    job checkpoints in ``checkpoint_dir`` under a name derived from its
+    audio and options, so a retry, or the same job submitted to a new pool
+    after the parent died, resumes from the last checkpoint instead of
+    starting over. ``start()`` removes checkpoints untouched for
+    ``STALE_CHECKPOINT_SECONDS``.
+
+    Job arguments and results cross a process boundary and must be picklable
+    (so no ``result_store``).
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        handler: Callable = transcribe_file,
+        preload_model: bool = True,
+        max_retries: int = 1,
+        checkpoint_dir: Path | None = None,
+    ) -> None:
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Pre-fork workers need the fork start method (Linux/macOS).")
+
+        self.size = workers or _default_worker_count()
+        self.max_retries = max_retries
+        if checkpoint_dir is None and handler is transcribe_file:
+            configured = os.getenv("STT_CHECKPOINT_DIR")
+            checkpoint_dir = Path(configured) if configured else Path(tempfile.gettempdir()) / "simpletext2speech_checkpoints"
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir is not None else None
+        self._handler = handler
+        self._preload_model = preload_model
+        self._context = multiprocessing.get_context("fork")
+        self._lock = threading.Lock()
+        self._pending: deque[_Job] = deque()
+        self._workers: list[_Worker] = []
+        self._exited: dict[int, int] = {}
+        self._zygote: multiprocessing.process.BaseProcess | None = None
+        self._control: Connection | None = None
+        self._monitor: threading.Thread | None = None
+        self._closing = False
+        self.restarts = 0
+
+    def start(self) -> "PreforkPool":
+        if self._monitor is not None:
+            return self
+
+        if self._preload_model:
+            get_model()
+        if self.checkpoint_dir is not None and self.checkpoint_dir.is_dir():
+            _remove_stale_checkpoints(self.checkpoint_dir, STALE_CHECKPOINT_SECONDS)
+
+        self._control, zygote_end = self._context.Pipe()
+        self._zygote = self._context.Process(
+            target=_zygote_main,
+            args=(self._handler, zygote_end, self._control),
+            name="prefork-zygote",
+            daemon=True,
+        )
+        # Objects frozen at fork time are never scanned (and so never copied)
+        # by the collector in the zygote or its workers; the parent unfreezes
+        # right away so its own garbage is still collected.
+        gc.freeze()
+        try:
+            self._zygote.start()
+        finally:
+            gc.unfreeze()
+        zygote_end.close()
+
+        with self._lock:
+            for _ in range(self.size):
+                self._workers.append(self._spawn())
+
+        self._monitor = threading.Thread(target=self._run, name="prefork-monitor", daemon=True)
+        self._monitor.start()
+        return self
+
+    def __enter__(self) -> "PreforkPool":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.shutdown()
+
+    def _spawn(self) -> _Worker:
+        if self._control is None:
+            raise RuntimeError("Worker zygote has exited.")
+        try:
+            self._control.send("spawn")
+            while True:
+                message = self._control.recv()
+                if message[0] == "spawned":
+                    break
+                _, pid, exit_code = message
+                self._exited[pid] = exit_code
+            connection = Connection(reduction.recv_handle(self._control))
+        except (EOFError, OSError) as exc:
+            raise RuntimeError("Worker zygote has exited.") from exc
+        return _Worker(pid=message[1], connection=connection)
+
+    @property
+    def pids(self) -> list[int]:
+        with self._lock:
+            return [worker.pid for worker in self._workers]
+
+    def submit(self, *args, **kwargs) -> Future:
+        """Queue ``handler(*args, **kwargs)``; by default a ``transcribe_file`` call."""
+        future: Future = Future()
+        checkpoint_path = None
+        if self.checkpoint_dir is not None and "checkpoint_path" not in kwargs:
+            # Hashes the audio here, once; the worker reuses the fingerprint.
+            name, kwargs["fingerprint"] = _job_checkpoint_name(self._handler, args, kwargs)
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            checkpoint_path = self.checkpoint_dir / name
+            kwargs["checkpoint_path"] = checkpoint_path
+        with self._lock:
+            if self._closing or self._monitor is None:
+                raise RuntimeError("Worker pool is not running.")
+            self._pending.append(_Job(future, args, kwargs, checkpoint_path=checkpoint_path))
+            self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        idle = [worker for worker in self._workers if worker.job is None and worker.alive]
+        while idle and self._pending:
+            job = self._pending.popleft()
+            if job.attempts == 0 and not job.future.set_running_or_notify_cancel():
+                continue
+            worker = idle.pop()
+            worker.job = job
+            job.attempts += 1
+            try:
+                worker.connection.send((job.args, job.kwargs))
+            except OSError:
+                # Already dead; its exit report puts the job back in the queue.
+                worker.alive = False
+
+    def _collect(self, worker: _Worker) -> None:
+        try:
+            status, payload = worker.connection.recv()
+        except (EOFError, OSError):
+            # Died mid-reply; its exit report replaces it.
+            worker.alive = False
+            return
+
+        job, worker.job = worker.job, None
+        if job is None:
+            return
+        _discard_checkpoint(job.checkpoint_path)
+        if status == "done":
+            job.future.set_result(payload)
+        else:
+            job.future.set_exception(payload)
+
+    def _read_exits(self) -> None:
+        try:
+            while self._control.poll():
+                _, pid, exit_code = self._control.recv()
+                self._exited[pid] = exit_code
+        except (EOFError, OSError):
+            self._control.close()
+            self._control = None
+
+    def _replace(self, worker: _Worker, exit_code: int | None) -> None:
+        # A reply sent just before exiting is still a result.
+        while worker.alive and worker.job is not None and worker.connection.poll():
+            self._collect(worker)
+        worker.connection.close()
+        self._workers.remove(worker)
+        self.restarts += 1
+
+        job = worker.job
+        if job is not None:
+            if job.attempts <= self.max_retries:
+                self._pending.appendleft(job)
+            else:
+                _discard_checkpoint(job.checkpoint_path)
+                job.future.set_exception(
+                    RuntimeError(
+                        f"Worker {worker.pid} exited with code {exit_code} "
+                        f"after {job.attempts} attempt(s)."
+                    )
+                )
+
+        if not self._closing or self._pending:
+            try:
+                self._workers.append(self._spawn())
+            except RuntimeError as exc:
+                if not self._workers:
+                    while self._pending:
+                        self._pending.popleft().future.set_exception(exc)
+
+    def _idle(self) -> bool:
+        return not self._pending and all(worker.job is None for worker in self._workers)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._closing and self._idle():
+                    break
+                connections = {worker.connection: worker for worker in self._workers if worker.alive}
+                control = [self._control] if self._control is not None else []
+
+            ready = wait([*connections, *control], timeout=0.2)
+
+            with self._lock:
+                for item in ready:
+                    if item in connections:
+                        self._collect(connections[item])
+                if self._control is not None:
+                    self._read_exits()
+                for worker in list(self._workers):
+                    if worker.pid in self._exited:
+                        self._replace(worker, self._exited.pop(worker.pid))
+                    elif self._control is None and not worker.alive:
+                        # No zygote left to report the exit code.
+                        self._replace(worker, None)
+                self._dispatch()
+
+        with self._lock:
+            for worker in self._workers:
+                try:
+                    worker.connection.send(None)
+                except OSError:
+                    pass
+            workers, self._workers = self._workers, []
+
+        remaining = {worker.connection: worker for worker in workers}
+        deadline = time.monotonic() + 5
+        while remaining and time.monotonic() < deadline:
+            for connection in wait(list(remaining), timeout=max(0.0, deadline - time.monotonic())):
+                # Idle workers only ever answer a shutdown with EOF.
+                remaining.pop(connection)
+        for worker in remaining.values():
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for worker in workers:
+            worker.connection.close()
+
+        # Closing the control pipe tells the zygote to exit.
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+        self._zygote.join(timeout=5)
+        if self._zygote.is_alive():
+            self._zygote.terminate()
+            self._zygote.join()
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        with self._lock:
+            if self._monitor is None:
+                return
+            self._closing = True
+            if cancel_pending:
+                while self._pending:
+                    self._pending.popleft().future.cancel()
+
+        if wait:
+            self._monitor.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Transcribe WAV files with pre-forked workers sharing one model.")
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--words", action="store_true", help="Include word timestamps")
+    args = parser.parse_args()
+
+    with PreforkPool(workers=args.workers) as pool:
+        futures = [(path, pool.submit(path, save_words=args.words)) for path in args.paths]
+        for path, future in futures:
+            try:
+                record = {"path": str(path), **future.result()}
+            except Exception as exc:
+                record = {"path": str(path), "error": str(exc)}
+            print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()